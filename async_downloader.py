@@ -0,0 +1,312 @@
+"""
+INSTAJECTION — asyncio Download Backend.
+Drop-in alternative to the threaded DownloadManager: the same public API
+(enqueue_image / enqueue_reel / download_image / download_reel / join /
+get_summary) driven by one aiohttp event loop, so hundreds of concurrent
+transfers cost coroutines instead of threads. Only socket reads run on the
+loop; file writes, hashing, validation and manifest commits go to a small
+disk thread pool so one slow disk operation never stalls other transfers.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Callable, List, Optional
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from downloader import DownloadManager, DownloadResult
+from file_writer import ChunkSizer
+from http_session import DEFAULT_HEADERS
+from media_format import sniff
+from rate_limiter import BandwidthLimiter, RateLimiter
+
+
+class AsyncDownloadManager(DownloadManager):
+    """DownloadManager whose transfers run on a private asyncio loop."""
+
+    DEFAULT_CONCURRENCY = 64     # concurrent transfers (coroutines)
+    LIMIT_PER_HOST = 16          # sockets per CDN host
+    CONNECT_TIMEOUT = 15
+    READ_TIMEOUT = 90
+    DISK_WORKERS = 8             # threads for file / SQLite work off the loop
+
+    def __init__(self, *args, concurrency: int = DEFAULT_CONCURRENCY,
+                 limit_per_host: int = LIMIT_PER_HOST, **kwargs):
+        if aiohttp is None:
+            raise RuntimeError("The asyncio backend needs 'aiohttp' (pip install aiohttp)")
+        kwargs.setdefault("workers", concurrency)
+        super().__init__(*args, **kwargs)
+        self.limit_per_host = max(1, int(limit_per_host))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._aqueue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._disk: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def available() -> bool:
+        return aiohttp is not None
+
+    # ── Event loop lifecycle ───────────────────────────────────
+
+    def start_workers(self):
+        """Start the event loop thread and its consumer coroutines."""
+        if self._loop is not None:
+            return
+        self._cancelled.clear()
+        self._disk = ThreadPoolExecutor(
+            max_workers=self.DISK_WORKERS, thread_name_prefix="download-disk",
+        )
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self._loop_thread = threading.Thread(
+            target=self._run_loop, args=(ready,), name="download-loop", daemon=True,
+        )
+        self._loop_thread.start()
+        ready.wait()
+        self._call(self._open())
+
+    def _run_loop(self, ready: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
+
+    def _call(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the loop from another thread and wait for it."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def _io(self, fn, *args):
+        """Run blocking disk / database work on the disk pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._disk, fn, *args)
+
+    async def _open(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.worker_count,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=DEFAULT_HEADERS,
+            timeout=aiohttp.ClientTimeout(
+                total=None, sock_connect=self.CONNECT_TIMEOUT, sock_read=self.READ_TIMEOUT,
+            ),
+            auto_decompress=False,
+        )
+        self._aqueue = asyncio.Queue(maxsize=self._jobs.maxsize)
+        self._tasks = [
+            asyncio.ensure_future(self._consumer()) for _ in range(self.worker_count)
+        ]
+
+    async def _consumer(self):
+        while True:
+            job = await self._aqueue.get()
+            try:
+                if job is None:
+                    return
+                if self._cancelled.is_set():
+                    continue
+                kind, url, post_id, index, group = job
+                ok = False
+                try:
+                    if kind == "reel":
+                        ok = await self._adownload_reel(url, post_id)
+                    else:
+                        ok = await self._adownload_image(url, post_id, index)
+                finally:
+                    # may seal the post in the manifest: off the loop too
+                    await self._io(self._job_done, group, ok)
+            except Exception as exc:
+                self.log(f"Worker error: {str(exc)[:80]}")
+            finally:
+                self._aqueue.task_done()
+
+    # ── Queue API (called from the scraper thread) ─────────────
+
+    def _enqueue(self, job):
+        if self._loop is None:
+            self.start_workers()
+        self._count_pending(job[4])
+        # asyncio.Queue is bounded: blocks the scraper only when full
+        fut = asyncio.run_coroutine_threadsafe(self._aqueue.put(job), self._loop)
+        while not self._cancelled.is_set():
+            try:
+                fut.result(timeout=0.5)
+                return
+            except FutureTimeout:
+                continue
+        fut.cancel()
+
+    def pending_jobs(self) -> int:
+        return self._aqueue.qsize() if self._aqueue is not None else 0
+
+    def join(self, cancel: bool = False):
+        """Drain (or drop) queued transfers, then close the loop."""
+        if self._loop is None:
+            return
+        if cancel:
+            self._cancelled.set()
+        elif self.pending_jobs():
+            self.log(f"Waiting for {self.pending_jobs()} queued download(s)…")
+        try:
+            self._call(self._shutdown(cancel), timeout=None if not cancel else 5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join(timeout=5)
+        self._loop = None
+        self._disk.shutdown(wait=True)
+        self._disk = None
+        self._stop_segment_pool(cancel)
+        self.transcoder.join(cancel=cancel)
+
+    async def _shutdown(self, cancel: bool):
+        if cancel:
+            for t in self._tasks:
+                t.cancel()
+        else:
+            for _ in self._tasks:
+                await self._aqueue.put(None)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._session.close()
+
+    # ── Blocking API (same semantics as the threaded backend) ──
+
+    def download_image(self, url: str, post_id: str, index: int = 0) -> bool:
+        if self._loop is None:
+            self.start_workers()
+        return self._call(self._adownload_image(url, post_id, index))
+
+    def download_reel(self, url: str, post_id: str) -> bool:
+        if self._loop is None:
+            self.start_workers()
+        return self._call(self._adownload_reel(url, post_id))
+
+    # ── Coroutine implementations ──────────────────────────────
+
+    async def _adownload_image(self, url: str, post_id: str, index: int) -> bool:
+        stem = f"{self.target_username}_img_{post_id}_{index + 1}"
+        if not self._reserve(stem, url):
+            self.log(f"Skipping duplicate: {stem}")
+            return True
+        res = await self._io(self._link_known_source, url, self.images_dir / stem)
+        if res is not None:
+            return await self._io(self._complete, post_id, index, "image", stem, url, res)
+        res = await self._adownload(url, self.images_dir / stem, self._image_ext)
+        return await self._io(self._publish_image, post_id, index, stem, url, res)
+
+    async def _adownload_reel(self, url: str, post_id: str) -> bool:
+        stem = f"{self.target_username}_reel_{post_id}"
+        if not self._reserve(stem, url):
+            self.log(f"Skipping duplicate reel: {stem}")
+            return True
+        res = await self._io(self._link_known_source, url, self.reels_dir / stem)
+        if res is None:
+            # Large reels: parallel ranges on the segment threads, off the loop
+            res = await asyncio.get_running_loop().run_in_executor(
+                None, self._download_segmented, url, self.reels_dir / stem, self._reel_ext,
+            )
+            if res is None:
+                res = await self._adownload(url, self.reels_dir / stem, self._reel_ext)
+            res = await self._io(self._publish_reel, res, url)
+        return await self._io(self._complete, post_id, 0, "reel", stem, url, res)
+
+    async def _athrottle(self, nbytes: int):
+        self.throughput.add(nbytes)
+        wait = max(BandwidthLimiter.shared().reserve(nbytes), self.bandwidth.reserve(nbytes))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _adownload(self, url: str, stem: Path,
+                         choose_ext: Callable[[Optional[str]], str],
+                         retries: int = 3) -> Optional[DownloadResult]:
+        """Coroutine twin of ``DownloadManager._download``."""
+        limiter = RateLimiter.shared()
+        part, meta = self._part_paths(stem)
+
+        for attempt in range(retries):
+            try:
+                offset, state, headers = await self._io(self._resume_request, part, meta)
+                wait = limiter.reserve(url)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                async with self._session.get(url, headers=headers) as resp:
+                    limiter.feedback(url, resp.status, resp.headers.get("Retry-After"))
+                    if resp.status == 416:
+                        done = await self._io(
+                            self._range_exhausted,
+                            part, meta, stem, choose_ext, offset, state, resp.headers,
+                        )
+                        if done is not None:
+                            return done
+                        continue
+                    resp.raise_for_status()
+
+                    start, total = self._response_span(resp.status, resp.headers)
+                    # re-hashing a resumed .part reads it back: off the loop
+                    offset, hasher, kind, sniffed = await self._io(
+                        self._stream_start, part, stem, state, offset, start, resp.status,
+                    )
+
+                    def store(chunk: bytes):
+                        hasher.update(chunk)
+                        out.write(chunk)
+
+                    sizer = ChunkSizer(self._remaining(total, offset), self._chunk_limit())
+                    out = self._writer(part, meta, offset, total, resp.headers)
+                    try:
+                        while True:
+                            want = sizer.next()
+                            chunk = await resp.content.read(want)
+                            if not chunk:
+                                break
+                            sizer.update(want, len(chunk))
+                            self.write_stats.add_read()
+                            if not sniffed:
+                                kind, sniffed = sniff(chunk, resp.headers.get("Content-Type")), True
+                                await self._io(
+                                    self._write_part_meta, meta, resp.headers, total, kind,
+                                )
+                            await self._io(store, chunk)
+                            await self._athrottle(len(chunk))
+                    finally:
+                        await self._io(out.close)
+                    size = out.position
+
+                if size > 0 and (total is None or size >= total):
+                    if await self._io(self._validate_part, part, kind, size, total):
+                        return await self._io(
+                            self._finish_part,
+                            part, meta, stem.with_name(stem.name + choose_ext(kind)),
+                            hasher.hexdigest(), kind, size,
+                        )
+                    await self._io(self._discard_part, part, meta)
+                elif size == 0:
+                    await self._io(self._discard_part, part, meta)
+                else:
+                    self.log(
+                        f"Attempt {attempt + 1}/{retries} failed: "
+                        f"short read ({size}/{total} bytes)"
+                    )
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                status = getattr(exc, "status", None)
+                wait = 0 if status in RateLimiter.THROTTLE_STATUS else (2 ** attempt) * 2
+                self.log(f"Attempt {attempt + 1}/{retries} failed: {str(exc)[:80]}")
+                if attempt < retries - 1 and wait:
+                    self.log(f"Retrying in {wait}s…")
+                    await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.log(f"Unexpected error: {str(exc)[:80]}")
+                break
+
+        return None
@@ -0,0 +1,323 @@
+"""
+INSTAJECTION — Download Throughput Benchmark.
+Drives DownloadManager (or the asyncio backend) against the local CDN
+stand-in and reports files/s, MB/s, per-file latency percentiles and CPU
+per file. Every run is saved as JSON so results can be compared across
+commits:
+
+    python benchmarks/bench_downloads.py --images 400 --reels 10 --workers 8
+    python benchmarks/bench_downloads.py --compare benchmarks/results/a.json benchmarks/results/b.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import threading
+import multiprocessing
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from cdn_server import ServerProfile, serve                    # noqa: E402
+from downloader import DownloadManager                         # noqa: E402
+from http_session import HttpClient                            # noqa: E402
+from rate_limiter import BandwidthLimiter, RateLimiter         # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+# ── Measurement helpers ────────────────────────────────────────
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _cpu_seconds() -> float:
+    """Process CPU including reaped children (the transcoder pool)."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, timeout=10,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _instrument(dm: DownloadManager, latencies: List[float]):
+    """Time every per-file download on both the thread and asyncio backends."""
+    lock = threading.Lock()
+
+    def timed(fn):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+        return wrapper
+
+    def atimed(fn):
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+        return wrapper
+
+    if hasattr(dm, "_adownload_image"):
+        dm._adownload_image = atimed(dm._adownload_image)
+        dm._adownload_reel = atimed(dm._adownload_reel)
+    else:
+        dm.download_image = timed(dm.download_image)
+        dm.download_reel = timed(dm.download_reel)
+
+
+# ── Benchmark run ──────────────────────────────────────────────
+
+def _make_manager(args, work_dir: str) -> DownloadManager:
+    options = dict(
+        link_mode=args.link_mode,
+        transcode_policy=args.transcode,
+        bandwidth_limit=0,
+        segment_threshold=int(args.segment_threshold_mb * 1024 * 1024),
+        segment_connections=args.segment_connections,
+    )
+    if args.backend == "asyncio":
+        from async_downloader import AsyncDownloadManager
+        return AsyncDownloadManager(
+            work_dir, "bench", lambda msg: None,
+            concurrency=args.workers, limit_per_host=args.pool, **options,
+        )
+    return DownloadManager(work_dir, "bench", lambda msg: None, workers=args.workers, **options)
+
+
+def run_benchmark(args) -> Dict:
+    profile = ServerProfile(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after, image_kb=args.image_kb, reel_mb=args.reel_mb,
+    )
+    ctx = multiprocessing.get_context("spawn")
+    ready, stop = ctx.Queue(), ctx.Event()
+    server = ctx.Process(target=serve, args=(profile, 0, ready, stop), daemon=True)
+    server.start()
+    port = ready.get(timeout=120)
+    base = f"http://127.0.0.1:{port}"
+
+    work_dir = tempfile.mkdtemp(prefix="instajection-bench-")
+    HttpClient.configure(pool_maxsize=max(args.workers, args.pool))
+    RateLimiter.configure(args.request_rate)
+    BandwidthLimiter.configure(0)
+    latencies: List[float] = []
+    try:
+        dm = _make_manager(args, work_dir)
+        _instrument(dm, latencies)
+
+        jobs = [("image", f"{base}/jpg/{i}") for i in range(args.images)]
+        jobs += [("image", f"{base}/webp/{i}") for i in range(args.webp)]
+        jobs += [("reel", f"{base}/mp4/{i}") for i in range(args.reels)]
+
+        cpu0, wall0 = _cpu_seconds(), time.perf_counter()
+        dm.start_timer()
+        dm.start_workers()
+        for i, (kind, url) in enumerate(jobs):
+            if kind == "reel":
+                dm.enqueue_reel(url, f"R{i}")
+            else:
+                dm.enqueue_image(url, f"P{i}", 0)
+        dm.join()
+        wall = time.perf_counter() - wall0
+        cpu = _cpu_seconds() - cpu0
+
+        saved = dm.total_images + dm.total_reels
+        nbytes = dm.throughput.total_bytes
+        result = {
+            "files": saved,
+            "failed": dm.failed_downloads,
+            "bytes": nbytes,
+            "wall_s": round(wall, 3),
+            "files_per_s": round(saved / wall, 2) if wall else 0,
+            "mb_per_s": round(nbytes / (1024 * 1024) / wall, 2) if wall else 0,
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 50) * 1000, 1),
+                "p90": round(_percentile(latencies, 90) * 1000, 1),
+                "p99": round(_percentile(latencies, 99) * 1000, 1),
+                "max": round(max(latencies, default=0) * 1000, 1),
+            },
+            "cpu_s": round(cpu, 3),
+            "cpu_ms_per_file": round(cpu * 1000 / saved, 2) if saved else 0,
+            "throttle_events": RateLimiter.shared().throttle_events,
+            "transcoded": dm.transcoder.converted,
+            "write_stats": dm.get_write_stats(),
+        }
+        dm.manifest.close()
+        dm.content_index.close()
+    finally:
+        stop.set()
+        try:
+            result_server = ready.get(timeout=30)
+        except Exception:
+            result_server = {}
+        server.join(timeout=10)
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    result["server"] = result_server
+    return result
+
+
+def _params(args) -> Dict:
+    keys = ("backend", "workers", "pool", "images", "webp", "reels", "image_kb", "reel_mb",
+            "latency_ms", "jitter_ms", "error_rate", "throttle_rate", "retry_after",
+            "request_rate", "transcode", "link_mode",
+            "segment_threshold_mb", "segment_connections")
+    return {k: getattr(args, k) for k in keys}
+
+
+def save_result(args, result: Dict) -> Path:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    commit = _git_commit()
+    label = args.label or f"{args.backend}-w{args.workers}"
+    out_dir = Path(args.output)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"{stamp}_{commit or 'nogit'}_{label}.json"
+    doc = {
+        "label": label,
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": _params(args),
+        "results": result,
+    }
+    path.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    return path
+
+
+# ── Reporting ──────────────────────────────────────────────────
+
+def print_result(result: Dict):
+    lat = result["latency_ms"]
+    ws = result["write_stats"]
+    print("----------------------------------------")
+    print(f"Files            : {result['files']} ok, {result['failed']} failed")
+    print(f"Throughput       : {result['files_per_s']} files/s, {result['mb_per_s']} MB/s")
+    print(f"Latency (ms)     : p50 {lat['p50']}  p90 {lat['p90']}  p99 {lat['p99']}  max {lat['max']}")
+    print(f"CPU              : {result['cpu_s']} s ({result['cpu_ms_per_file']} ms/file)")
+    print(f"Throttle Events  : {result['throttle_events']}")
+    print(f"Disk Writes      : {ws['write_calls']} writes, {ws['reads']} reads, "
+          f"{ws['preallocated_files']} preallocated")
+    print(f"Wall Time        : {result['wall_s']} s")
+    print("----------------------------------------")
+
+
+_COMPARE = (
+    ("files_per_s", "files/s", True),
+    ("mb_per_s", "MB/s", True),
+    ("latency_ms.p50", "p50 ms", False),
+    ("latency_ms.p99", "p99 ms", False),
+    ("cpu_ms_per_file", "CPU ms/file", False),
+    ("wall_s", "wall s", False),
+)
+
+
+def compare(paths: List[str]):
+    """Print each run against the first one (the baseline)."""
+    docs = [json.loads(Path(p).read_text(encoding="utf-8")) for p in paths]
+
+    def pick(doc, dotted):
+        value = doc["results"]
+        for part in dotted.split("."):
+            value = value[part]
+        return value
+
+    base = docs[0]
+    print(f"{'metric':<14}" + "".join(f"{d['label'][:18]:>20}" for d in docs))
+    for key, name, higher_better in _COMPARE:
+        row = f"{name:<14}"
+        b = pick(base, key)
+        for d in docs:
+            v = pick(d, key)
+            delta = ""
+            if d is not base and b:
+                change = (v - b) / b * 100
+                better = change > 0 if higher_better else change < 0
+                delta = f" ({change:+.0f}%{'' if better or not change else '!'})"
+            row += f"{str(v) + delta:>20}"
+        print(row)
+
+
+def _parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Offline DownloadManager throughput benchmark")
+    ap.add_argument("--backend", choices=("threads", "asyncio"), default="threads")
+    ap.add_argument("--workers", type=int, default=DownloadManager.DEFAULT_WORKERS,
+                    help="download threads / asyncio concurrency")
+    ap.add_argument("--pool", type=int, default=16, help="keep-alive sockets per host")
+    ap.add_argument("--images", type=int, default=200, help="JPEG downloads")
+    ap.add_argument("--webp", type=int, default=0, help="WebP downloads (transcoded)")
+    ap.add_argument("--reels", type=int, default=4, help="MP4 downloads")
+    ap.add_argument("--image-kb", type=int, default=150)
+    ap.add_argument("--reel-mb", type=float, default=8.0)
+    ap.add_argument("--latency-ms", type=float, default=20.0)
+    ap.add_argument("--jitter-ms", type=float, default=10.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--throttle-rate", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=int, default=1)
+    ap.add_argument("--request-rate", type=float, default=1000.0,
+                    help="per-host request rate cap (the app default is 8)")
+    ap.add_argument("--transcode", choices=("original", "jpeg", "progressive"),
+                    default="original")
+    ap.add_argument("--link-mode", choices=DownloadManager.LINK_MODES, default="off")
+    ap.add_argument("--segment-threshold-mb", type=float, default=8.0,
+                    help="split reels at least this big into ranges (0 = off)")
+    ap.add_argument("--segment-connections", type=int,
+                    default=DownloadManager.SEGMENT_CONNECTIONS)
+    ap.add_argument("--label", default="", help="name stored with the results")
+    ap.add_argument("--output", default=str(RESULTS_DIR), help="results directory")
+    ap.add_argument("--keep", action="store_true", help="keep the downloaded files")
+    ap.add_argument("--no-save", action="store_true", help="print only")
+    ap.add_argument("--compare", nargs="+", metavar="JSON",
+                    help="compare saved results instead of running")
+    return ap
+
+
+def main():
+    args = _parser().parse_args()
+    if args.compare:
+        compare(args.compare)
+        return
+    print(f"Benchmark: {args.backend} backend, {args.workers} workers, "
+          f"{args.images} jpg + {args.webp} webp + {args.reels} reels")
+    result = run_benchmark(args)
+    print_result(result)
+    if not args.no_save:
+        print(f"Saved: {save_result(args, result)}")
+
+
+if __name__ == "__main__":
+    main()
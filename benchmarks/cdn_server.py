@@ -0,0 +1,262 @@
+"""
+INSTAJECTION — Local CDN Stand-in.
+Threaded HTTP/1.1 server that serves synthetic JPEG, WebP and MP4 payloads
+with configurable latency, jitter, error and throttling rates, so download
+throughput can be measured offline and reproducibly.
+
+Routes:  /jpg/<n>   /webp/<n>   /mp4/<n>    (GET and HEAD, single Range)
+
+Run standalone:  python benchmarks/cdn_server.py --port 8800 --latency-ms 40
+"""
+
+import io
+import re
+import time
+import random
+import struct
+import hashlib
+import argparse
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+
+@dataclass
+class ServerProfile:
+    """Network behaviour of the stand-in CDN."""
+    latency_ms: float = 20.0      # time to first byte
+    jitter_ms: float = 10.0       # ± uniform noise on the latency
+    error_rate: float = 0.0       # fraction of requests answered with 500
+    throttle_rate: float = 0.0    # fraction answered with 429
+    retry_after: int = 1          # Retry-After sent with each 429
+    image_kb: int = 150           # approximate synthetic image size
+    reel_mb: float = 8.0          # synthetic reel size
+    cut_after_mb: float = 0.0     # drop each URL's first full response after this much (0 = off)
+    variants: int = 16            # distinct base payloads per format
+    seed: int = 1
+
+
+# ── Synthetic payloads ─────────────────────────────────────────
+
+def _noise_image(rng: random.Random, size_kb: int) -> Image.Image:
+    """Random-noise RGB image whose JPEG encodes to roughly ``size_kb``."""
+    side = max(32, int((size_kb * 1024 / 1.1) ** 0.5))
+    return Image.frombytes("RGB", (side, side), rng.randbytes(side * side * 3))
+
+
+def _encode(img: Image.Image, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, fmt, quality=85)
+    return buf.getvalue()
+
+
+def _fake_mp4(rng: random.Random, size: int) -> bytes:
+    """ftyp + moov + mdat boxes around random bytes — enough for sniffing/box walks."""
+    ftyp = struct.pack(">I4s4sI", 24, b"ftyp", b"isom", 512) + b"isomiso2"
+    moov = struct.pack(">I4s", 8 + 256, b"moov") + rng.randbytes(256)
+    body = rng.randbytes(max(0, size - len(ftyp) - len(moov) - 8))
+    return ftyp + moov + struct.pack(">I4s", len(body) + 8, b"mdat") + body
+
+
+def _tag_jpeg(data: bytes, n: int) -> bytes:
+    """Make each JPEG URL unique with a COM segment after SOI."""
+    note = f"instajection-bench {n}".encode()
+    return data[:2] + b"\xff\xfe" + struct.pack(">H", len(note) + 2) + note + data[2:]
+
+
+class PayloadStore:
+    """Pre-rendered payloads so serving never competes with the client for CPU."""
+
+    def __init__(self, profile: ServerProfile):
+        rng = random.Random(profile.seed)
+        self.jpg: List[bytes] = []
+        self.webp: List[bytes] = []
+        self.mp4: List[bytes] = []
+        for _ in range(max(1, profile.variants)):
+            img = _noise_image(rng, profile.image_kb)
+            self.jpg.append(_encode(img, "JPEG"))
+            self.webp.append(_encode(img, "WEBP"))
+        for _ in range(max(1, min(profile.variants, 4))):
+            self.mp4.append(_fake_mp4(rng, int(profile.reel_mb * 1024 * 1024)))
+
+    def get(self, kind: str, n: int) -> Optional[bytes]:
+        pool = getattr(self, kind, None)
+        if not pool:
+            return None
+        data = pool[n % len(pool)]
+        return _tag_jpeg(data, n) if kind == "jpg" else data
+
+
+# ── Request handling ───────────────────────────────────────────
+
+_CONTENT_TYPES = {"jpg": "image/jpeg", "webp": "image/webp", "mp4": "video/mp4"}
+_ROUTE = re.compile(r"^/(jpg|webp|mp4)/(\d+)")
+
+
+class CDNHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"     # keep-alive, like the real CDN
+    server_version = "BenchCDN/1.0"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def _delay(self):
+        p: ServerProfile = self.server.profile
+        delay = p.latency_ms + random.uniform(-p.jitter_ms, p.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _empty(self, status: int, headers: Dict[str, str] = None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _serve(self, head: bool):
+        self.server.count_request()
+        if not head:
+            self.server.log_range(self.path, self.headers.get("Range"))
+        m = _ROUTE.match(self.path)
+        data = self.server.store.get(m.group(1), int(m.group(2))) if m else None
+        self._delay()
+        if data is None:
+            return self._empty(404)
+
+        p: ServerProfile = self.server.profile
+        roll = random.random()
+        if roll < p.throttle_rate:
+            self.server.count_status(429)
+            return self._empty(429, {"Retry-After": str(p.retry_after)})
+        if roll < p.throttle_rate + p.error_rate:
+            self.server.count_status(500)
+            return self._empty(500)
+
+        etag = '"%s"' % hashlib.md5(data).hexdigest()
+        start, end, status = 0, len(data) - 1, 200
+        rng = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if rng and (not if_range or if_range == etag):
+            rm = re.match(r"bytes=(\d+)-(\d*)", rng)
+            if rm:
+                start = int(rm.group(1))
+                if rm.group(2):
+                    end = min(int(rm.group(2)), end)
+                if start >= len(data):
+                    return self._empty(416, {"Content-Range": f"bytes */{len(data)}"})
+                status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", _CONTENT_TYPES[m.group(1)])
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", etag)
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+        self.server.count_status(status)
+        if not head:
+            if status == 200 and self.server.first_full_response(self.path):
+                end = min(end, start + int(p.cut_after_mb * 1024 * 1024) - 1)
+                self.close_connection = True     # short body: the client sees a cut
+            try:
+                self.wfile.write(memoryview(data)[start:end + 1])
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+
+class CDNServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, profile: ServerProfile):
+        self.profile = profile
+        self.store = PayloadStore(profile)
+        self.requests = 0
+        self.statuses: Dict[int, int] = {}
+        self.ranges: Dict[str, List[Optional[str]]] = {}    # Range header per request
+        self._cut: set = set()
+        self._lock = threading.Lock()
+        super().__init__(address, CDNHandler)
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def count_status(self, status: int):
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def log_range(self, path: str, value: Optional[str]):
+        with self._lock:
+            self.ranges.setdefault(path, []).append(value)
+
+    def first_full_response(self, path: str) -> bool:
+        """True once per path when ``cut_after_mb`` is set."""
+        if self.profile.cut_after_mb <= 0:
+            return False
+        with self._lock:
+            if path in self._cut:
+                return False
+            self._cut.add(path)
+            return True
+
+
+def serve(profile: ServerProfile, port: int = 0, ready=None, stop=None):
+    """Run the server until ``stop`` is set; reports the bound port on ``ready``.
+
+    ``ready`` / ``stop`` are multiprocessing primitives when the benchmark
+    runs the server in a child process, so its CPU is not billed to the
+    downloader.
+    """
+    server = CDNServer(("127.0.0.1", port), profile)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    if ready is not None:
+        ready.put(server.server_address[1])
+    try:
+        if stop is None:
+            thread.join()
+        else:
+            stop.wait()
+    finally:
+        server.shutdown()
+        server.server_close()
+        if ready is not None:
+            ready.put({"requests": server.requests, "statuses": server.statuses})
+
+
+def _parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Synthetic media CDN for download benchmarks")
+    ap.add_argument("--port", type=int, default=8800)
+    ap.add_argument("--latency-ms", type=float, default=ServerProfile.latency_ms)
+    ap.add_argument("--jitter-ms", type=float, default=ServerProfile.jitter_ms)
+    ap.add_argument("--error-rate", type=float, default=ServerProfile.error_rate)
+    ap.add_argument("--throttle-rate", type=float, default=ServerProfile.throttle_rate)
+    ap.add_argument("--retry-after", type=int, default=ServerProfile.retry_after)
+    ap.add_argument("--image-kb", type=int, default=ServerProfile.image_kb)
+    ap.add_argument("--reel-mb", type=float, default=ServerProfile.reel_mb)
+    return ap
+
+
+if __name__ == "__main__":
+    args = _parser().parse_args()
+    prof = ServerProfile(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after, image_kb=args.image_kb, reel_mb=args.reel_mb,
+    )
+    print(f"Serving synthetic media on http://127.0.0.1:{args.port}/ (Ctrl+C to stop)")
+    try:
+        serve(prof, args.port)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,100 @@
+"""
+INSTAJECTION — Resume Regression Check.
+Serves a reel from the local CDN stand-in, drops the first response part
+way through, and checks that each download backend retries with a
+``Range`` request from the bytes it already has instead of starting over.
+The reel is larger than ``PREALLOCATE_MIN``, so the preallocated-file
+checkpoint path is the one exercised:
+
+    python benchmarks/check_resume.py
+    python benchmarks/check_resume.py --reel-mb 12 --cut-mb 3
+"""
+
+import re
+import sys
+import shutil
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from cdn_server import CDNServer, ServerProfile                # noqa: E402
+from downloader import DownloadManager                         # noqa: E402
+from file_writer import PREALLOCATE_MIN                        # noqa: E402
+from rate_limiter import BandwidthLimiter, RateLimiter         # noqa: E402
+
+
+def _make_manager(backend: str, work_dir: str) -> DownloadManager:
+    # single stream: segmented downloads never resume a .part
+    options = dict(segment_threshold=0, bandwidth_limit=0)
+    if backend == "asyncio":
+        from async_downloader import AsyncDownloadManager
+        return AsyncDownloadManager(work_dir, "check", lambda msg: None, **options)
+    return DownloadManager(work_dir, "check", lambda msg: None, **options)
+
+
+def _range_start(value: Optional[str]) -> int:
+    m = re.match(r"bytes=(\d+)-", value or "")
+    return int(m.group(1)) if m else 0
+
+
+def check(backend: str, server: CDNServer, base: str, n: int) -> bool:
+    path = f"/mp4/{n}"
+    expected = server.store.get("mp4", n)
+    work_dir = tempfile.mkdtemp(prefix="instajection-resume-")
+    dm = _make_manager(backend, work_dir)
+    try:
+        ok = dm.download_reel(base + path, f"R{n}")
+        saved = next(dm.reels_dir.glob(f"check_reel_R{n}.*"), None)
+        intact = saved is not None and saved.read_bytes() == expected
+    finally:
+        dm.join()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    ranges: List[Optional[str]] = server.ranges.get(path, [])
+    resumed = len(ranges) >= 2 and _range_start(ranges[1]) > 0
+    passed = ok and intact and resumed
+    print(f"{backend:>8}: {'PASS' if passed else 'FAIL'}  "
+          f"saved={ok} intact={intact} ranges requested: {ranges}")
+    return passed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Check that a cut download resumes with Range")
+    ap.add_argument("--reel-mb", type=float, default=12.0)
+    ap.add_argument("--cut-mb", type=float, default=3.0)
+    args = ap.parse_args()
+    if args.reel_mb * 1024 * 1024 < PREALLOCATE_MIN:
+        ap.error(f"--reel-mb must be at least {PREALLOCATE_MIN / (1024 * 1024):.0f} MB")
+
+    profile = ServerProfile(
+        latency_ms=0, jitter_ms=0, reel_mb=args.reel_mb, cut_after_mb=args.cut_mb,
+    )
+    server = CDNServer(("127.0.0.1", 0), profile)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    RateLimiter.configure(1000.0)
+    BandwidthLimiter.configure(0)
+
+    backends = ["threads"]
+    try:
+        from async_downloader import AsyncDownloadManager
+        if AsyncDownloadManager.available():
+            backends.append("asyncio")
+    except ImportError:
+        pass
+    try:
+        results = [check(b, server, base, n) for n, b in enumerate(backends)]
+    finally:
+        server.shutdown()
+        server.server_close()
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+INSTAJECTION — Parallel Browser Pool.
+Runs post jobs on several Firefox instances that share the logged-in
+session: cookies exported from the main browser after login are imported
+into each extra instance. Workers are health-checked before every job and
+restarted (with a fresh session import) when they die or get logged out.
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+
+def add_cookies(driver, cookies: List[Dict[str, Any]]) -> int:
+    """Set exported cookies on the open origin; returns how many were accepted."""
+    added = 0
+    for cookie in cookies:
+        cookie = {k: v for k, v in cookie.items() if k != "sameSite"}
+        try:
+            driver.add_cookie(cookie)
+            added += 1
+        except WebDriverException:
+            continue
+    return added
+
+
+class BrowserWorker:
+    """One Firefox instance owned by the pool."""
+
+    def __init__(self, index: int, driver, owned: bool = True):
+        self.index = index
+        self.driver = driver
+        self.owned = owned          # False for the bot's own (main) driver
+        self.restarts = 0
+        self.jobs_done = 0
+
+
+class BrowserPool:
+    """N logged-in browsers pulling post jobs from one queue."""
+
+    MAX_RESTARTS = 3            # per worker, before it is retired
+    MAX_JOB_ATTEMPTS = 2        # a job whose browser crashed is retried once
+
+    def __init__(self, size: int, driver_factory: Callable[[], Any],
+                 base_url: str, log_callback=None, stop_flag=None,
+                 quit_driver: Optional[Callable[[Any], None]] = None):
+        self.size = max(1, int(size))
+        self.driver_factory = driver_factory
+        self.quit_driver = quit_driver      # counterpart of driver_factory
+        self.base_url = base_url.rstrip("/")
+        self.log = log_callback or print
+        self.stop_flag = stop_flag
+        self.cookies: List[Dict[str, Any]] = []
+        self.workers: List[BrowserWorker] = []
+        self._lock = threading.Lock()
+
+    def should_stop(self) -> bool:
+        return bool(self.stop_flag and self.stop_flag.is_set())
+
+    # ── Lifecycle ──────────────────────────────────────────────
+
+    def start(self, main_driver) -> int:
+        """Export the session from ``main_driver`` and open the extra browsers.
+
+        The main driver becomes worker 0; returns the number of workers.
+        """
+        self.cookies = main_driver.get_cookies()
+        self.workers = [BrowserWorker(0, main_driver, owned=False)]
+        return self.grow(self.size)
+
+    def grow(self, size: int) -> int:
+        """Open extra browsers until the pool has ``size`` workers.
+
+        Returns the number of workers, which stays lower if a launch fails.
+        """
+        self.size = max(self.size, int(size))
+        before = len(self.workers)
+        for i in range(before, self.size):
+            if self.should_stop():
+                break
+            driver = self._open_browser()
+            if driver is None:
+                self.log(f"⚠️  Browser worker {i} failed to start — continuing with "
+                         f"{len(self.workers)}")
+                break
+            with self._lock:
+                self.workers.append(BrowserWorker(i, driver))
+        if len(self.workers) > max(1, before):
+            self.log(f"🧭 Browser pool ready: {len(self.workers)} logged-in browsers")
+        return len(self.workers)
+
+    def _open_browser(self):
+        try:
+            driver = self.driver_factory()
+        except Exception as exc:
+            self.log(f"⚠️  Browser launch failed: {str(exc)[:120]}")
+            return None
+        if driver is None:
+            return None
+        if not self._import_session(driver):
+            self._quit(driver)
+            return None
+        return driver
+
+    def _import_session(self, driver) -> bool:
+        """Load the exported cookies; the domain must be open first."""
+        try:
+            driver.get(self.base_url + "/robots.txt")
+            add_cookies(driver, self.cookies)
+            driver.get(self.base_url + "/")
+            return "/accounts/login" not in (driver.current_url or "")
+        except WebDriverException as exc:
+            self.log(f"⚠️  Session import failed: {str(exc)[:120]}")
+            return False
+
+    def _quit(self, driver):
+        try:
+            if self.quit_driver is not None:
+                self.quit_driver(driver)
+            else:
+                driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Quit every browser the pool opened (never the main driver)."""
+        with self._lock:
+            workers, self.workers = self.workers, []
+        for w in workers:
+            if w.owned and w.driver is not None:
+                self._quit(w.driver)
+                w.driver = None
+
+    # ── Health ─────────────────────────────────────────────────
+
+    def healthy(self, worker: BrowserWorker) -> bool:
+        """Browser responds and is still logged in."""
+        if worker.driver is None:
+            return False
+        try:
+            worker.driver.execute_script("return document.readyState")
+            return "/accounts/login" not in (worker.driver.current_url or "")
+        except Exception:
+            return False
+
+    def restart(self, worker: BrowserWorker) -> bool:
+        """Replace a dead or logged-out browser; the main one is only re-logged."""
+        if worker.restarts >= self.MAX_RESTARTS:
+            return False
+        worker.restarts += 1
+        self.log(f"🔄 Restarting browser worker {worker.index} "
+                 f"(attempt {worker.restarts}/{self.MAX_RESTARTS})")
+        if not worker.owned:
+            return worker.driver is not None and self._import_session(worker.driver)
+        if worker.driver is not None:
+            self._quit(worker.driver)
+        worker.driver = self._open_browser()
+        return worker.driver is not None
+
+    # ── Job distribution ───────────────────────────────────────
+
+    def run(self, jobs: List[Any], handler: Callable[[Any, Any], bool]) -> int:
+        """Run ``handler(driver, job)`` for every job across the workers.
+
+        The handler returns False when the job produced nothing and may be
+        worth another try; if the worker's browser turns out to be dead or
+        logged out, it is restarted and the job goes back on the queue.
+        Returns the number of jobs left undone (stop requested, or every
+        worker retired).
+        """
+        pending: "queue.Queue" = queue.Queue()
+        for job in jobs:
+            pending.put((job, 0))
+        threads = [
+            threading.Thread(
+                target=self._work, args=(w, pending, handler),
+                name=f"browser-{w.index}", daemon=True,
+            )
+            for w in list(self.workers)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return pending.qsize()
+
+    def _work(self, worker: BrowserWorker, pending: "queue.Queue", handler):
+        while not self.should_stop():
+            try:
+                job, attempts = pending.get_nowait()
+            except queue.Empty:
+                return
+            if not self.healthy(worker) and not self.restart(worker):
+                pending.put((job, attempts))
+                self.log(f"⚠️  Browser worker {worker.index} retired")
+                return
+            try:
+                done = handler(worker.driver, job) is not False
+            except WebDriverException as exc:
+                self.log(f"⚠️  Browser worker {worker.index} error: {str(exc)[:100]}")
+                done = False
+            if self.should_stop():
+                return
+            if done or self.healthy(worker):
+                worker.jobs_done += 1
+                continue
+            if attempts + 1 < self.MAX_JOB_ATTEMPTS:
+                pending.put((job, attempts + 1))
+            if not self.restart(worker):
+                self.log(f"⚠️  Browser worker {worker.index} retired")
+                return
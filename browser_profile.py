@@ -0,0 +1,104 @@
+"""
+INSTAJECTION — Lean Browser Profile.
+Preferences and on-disk profiles for the "lean" browser mode: headless,
+no image / video / font bytes, small caches and fewer content processes.
+Media is downloaded over HTTP by the download manager, so the browser only
+has to build the DOM and run the page's own API calls.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Set, Union
+
+
+LEAN_PREFS: Dict[str, Union[bool, int, str]] = {
+    # ── Bytes the bot never looks at ───────────────────────
+    "permissions.default.image": 2,             # src/srcset stay in the DOM
+    "gfx.downloadable_fonts.enabled": False,
+    "media.autoplay.default": 5,
+    "media.autoplay.blocking_policy": 2,
+    "media.preload.default": 0,
+    "media.preload.auto": 0,
+    "media.videocontrols.picture-in-picture.enabled": False,
+
+    # ── Speculative traffic ────────────────────────────────
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "network.http.speculative-parallel-limit": 0,
+    "browser.urlbar.speculativeConnect.enabled": False,
+
+    # ── Cache / memory ─────────────────────────────────────
+    "browser.cache.disk.enable": False,
+    "browser.cache.memory.capacity": 65536,     # KB
+    "browser.sessionhistory.max_entries": 2,
+    "browser.sessionhistory.max_total_viewers": 0,
+    "dom.ipc.processCount": 1,
+    "fission.autostart": False,
+    "image.mem.decode_bytes_at_a_time": 16384,
+
+    # ── Background services ────────────────────────────────
+    "app.update.auto": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "toolkit.telemetry.enabled": False,
+    "extensions.pocket.enabled": False,
+}
+
+
+def prepare_profile(root: Path, slot: int) -> Path:
+    """Profile directory for one browser, seeded with ``user.js`` on first use.
+
+    Directories are reused across runs (warm startup cache, no per-launch
+    profile copy); each concurrently running browser needs its own slot
+    (see ``ProfileSlots``).
+    """
+    path = Path(root) / f"lean-{slot}"
+    path.mkdir(parents=True, exist_ok=True)
+    user_js = path / "user.js"
+    text = "".join(
+        f"user_pref({json.dumps(k)}, {json.dumps(v)});\n" for k, v in LEAN_PREFS.items()
+    )
+    try:
+        if not user_js.exists() or user_js.read_text(encoding="utf-8") != text:
+            user_js.write_text(text, encoding="utf-8")
+    except OSError:
+        pass
+    return path
+
+
+class ProfileSlots:
+    """Profile slots of the running browsers, lowest free slot first.
+
+    A slot is released when its browser quits, so a restarted browser
+    reuses the directory of the one it replaces instead of creating a new
+    one, and the number of profile directories stays at the pool size.
+    """
+
+    def __init__(self):
+        self._used: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> int:
+        with self._lock:
+            slot = 0
+            while slot in self._used:
+                slot += 1
+            self._used.add(slot)
+            return slot
+
+    def release(self, slot: int):
+        with self._lock:
+            self._used.discard(slot)
+
+
+def apply_lean(opts, profile_dir: Optional[Path] = None):
+    """Turn Firefox options into the lean, headless variant."""
+    opts.add_argument("-headless")
+    for key, value in LEAN_PREFS.items():
+        opts.set_preference(key, value)
+    if profile_dir is not None:
+        opts.add_argument("-profile")
+        opts.add_argument(str(profile_dir))
@@ -0,0 +1,104 @@
+"""
+INSTAJECTION — CDN URL Helpers.
+Canonical asset keys for Instagram CDN URLs, so one photo or video served
+at several sizes or with fresh signatures is recognised as the same asset,
+and srcset selection of its largest rendition.
+"""
+
+import base64
+import json
+import re
+from typing import List, Tuple
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse
+
+
+# Path segments that only describe a rendition (size, crop, quality)
+_RENDITION_SEGMENT = re.compile(r"^(?:[sp]\d+x\d+|e\d+|c[\d.]+a?|sh[\d.]+)$")
+_DIMENSIONS = re.compile(r"[sp](\d+)x(\d+)")
+_MIN_ID_LENGTH = 16     # CDN asset file names are long numeric/base64 ids
+# Query parameters that change per request / edge, not per file
+_VOLATILE_PARAMS = ("oh", "oe", "ccb", "edm", "_nc_")
+
+
+def asset_key(url: str) -> str:
+    """Stable identity of the asset behind a CDN URL.
+
+    Query strings (signatures, expiry, ``stp`` transforms), hosts and
+    rendition path segments are ignored; the asset's file name — unique
+    per upload on Instagram's CDN — is the key when it looks like one.
+    """
+    if not url:
+        return ""
+    parsed = urlparse(url)
+    parts = [p for p in parsed.path.split("/") if p and not _RENDITION_SEGMENT.match(p)]
+    if not parts:
+        return url
+    name = parts[-1].rsplit(".", 1)[0]
+    if len(name) >= _MIN_ID_LENGTH:
+        return name
+    return "/".join(parts)
+
+
+def unescape(url: str) -> str:
+    """Undo JSON / HTML escaping of a URL scraped from page data."""
+    return url.replace("\\u0026", "&").replace("\\/", "/").replace("&amp;", "&")
+
+
+def canonical_url(url: str) -> str:
+    """Host-independent URL of the same bytes: signature, expiry and edge
+    routing parameters dropped, the rest sorted."""
+    parsed = urlparse(unescape(url))
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.startswith(_VOLATILE_PARAMS)
+    )
+    return parsed.path + ("?" + urlencode(query) if query else "")
+
+
+def bitrate_hint(url: str) -> int:
+    """Bitrate from the base64 ``efg`` JSON the CDN adds to video URLs, else 0."""
+    for efg in parse_qs(urlparse(url).query).get("efg", []):
+        try:
+            data = json.loads(base64.urlsafe_b64decode(efg + "=" * (-len(efg) % 4)))
+        except (ValueError, TypeError):
+            continue
+        if isinstance(data, dict):
+            try:
+                return int(data.get("bitrate") or 0)
+            except (TypeError, ValueError):
+                return 0
+    return 0
+
+
+def size_hint(url: str) -> int:
+    """Largest dimension named in the URL (``s1080x1080`` / ``stp=…_p640x640``), else 0."""
+    parsed = urlparse(url)
+    text = parsed.path + " " + " ".join(parse_qs(parsed.query).get("stp", []))
+    return max((max(int(w), int(h)) for w, h in _DIMENSIONS.findall(text)), default=0)
+
+
+def _srcset(srcset: str) -> List[Tuple[str, int]]:
+    out = []
+    for entry in srcset.split(","):
+        bits = entry.strip().split()
+        if not bits:
+            continue
+        width = 0
+        if len(bits) > 1 and bits[-1].endswith("w") and bits[-1][:-1].isdigit():
+            width = int(bits[-1][:-1])
+        out.append((bits[0], width))
+    return out
+
+
+def largest_variant(src: str, srcset: str = "") -> str:
+    """The widest rendition among ``src`` and its ``srcset`` candidates."""
+    candidates = _srcset(srcset) if srcset else []
+    candidates.append((src, 0))
+    best, best_w = src, -1
+    for url, width in candidates:
+        if not url:
+            continue
+        width = width or size_hint(url)
+        if width > best_w:
+            best, best_w = url, width
+    return best
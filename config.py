@@ -6,6 +6,7 @@ Handles encrypted credential storage and application settings persistence.
 import os
 import json
 from pathlib import Path
+from typing import Optional
 from cryptography.fernet import Fernet
 
 
@@ -88,6 +89,31 @@ class ConfigManager:
         config["remember_me"] = False
         self._save_config(config)
 
+    # ── Browser session ────────────────────────────────────────
+
+    def save_session(self, username: str, session: dict):
+        """Encrypt and persist a logged-in browser session (cookies, storage)."""
+        config = self._load_config()
+        sessions = config.setdefault("sessions", {})
+        sessions[username.lower()] = self._encrypt(json.dumps(session))
+        self._save_config(config)
+
+    def load_session(self, username: str) -> Optional[dict]:
+        """Return the saved session for ``username`` or None."""
+        token = self._load_config().get("sessions", {}).get(username.lower())
+        if not token:
+            return None
+        try:
+            return json.loads(self._decrypt(token))
+        except Exception:
+            return None
+
+    def clear_session(self, username: str):
+        """Forget the saved session for ``username``."""
+        config = self._load_config()
+        if config.get("sessions", {}).pop(username.lower(), None) is not None:
+            self._save_config(config)
+
     # ── Settings ───────────────────────────────────────────────
 
     def get_download_order(self) -> str:
@@ -99,5 +125,240 @@ class ConfigManager:
         config["download_order"] = order
         self._save_config(config)
 
+    def get_download_workers(self) -> int:
+        """Number of concurrent download worker threads (default 4)."""
+        try:
+            return max(1, int(self._load_config().get("download_workers", 4)))
+        except (TypeError, ValueError):
+            return 4
+
+    def set_download_workers(self, workers: int):
+        config = self._load_config()
+        config["download_workers"] = max(1, int(workers))
+        self._save_config(config)
+
+    def get_http_pool_size(self) -> int:
+        """Keep-alive connections kept per CDN host (default 16)."""
+        try:
+            return max(1, int(self._load_config().get("http_pool_size", 16)))
+        except (TypeError, ValueError):
+            return 16
+
+    def set_http_pool_size(self, size: int):
+        config = self._load_config()
+        config["http_pool_size"] = max(1, int(size))
+        self._save_config(config)
+
+    def get_incremental_sync(self) -> bool:
+        """Stop scrolling at already-archived posts once a full sync exists."""
+        return bool(self._load_config().get("incremental_sync", True))
+
+    def set_incremental_sync(self, enabled: bool):
+        config = self._load_config()
+        config["incremental_sync"] = bool(enabled)
+        self._save_config(config)
+
+    def get_dedup_link_mode(self) -> str:
+        """'off' (default), 'hardlink' or 'reflink' for identical content."""
+        mode = self._load_config().get("dedup_link_mode", "off")
+        return mode if mode in ("off", "hardlink", "reflink") else "off"
+
+    def set_dedup_link_mode(self, mode: str):
+        config = self._load_config()
+        config["dedup_link_mode"] = mode
+        self._save_config(config)
+
+    def get_transcode_policy(self) -> str:
+        """'jpeg' (default), 'progressive' or 'original' (keep WebP bytes)."""
+        policy = self._load_config().get("transcode_policy", "jpeg")
+        return policy if policy in ("original", "jpeg", "progressive") else "jpeg"
+
+    def set_transcode_policy(self, policy: str):
+        config = self._load_config()
+        config["transcode_policy"] = policy
+        self._save_config(config)
+
+    def get_jpeg_quality(self) -> int:
+        """JPEG quality used when re-encoding WebP images (default 100)."""
+        try:
+            return max(1, min(100, int(self._load_config().get("jpeg_quality", 100))))
+        except (TypeError, ValueError):
+            return 100
+
+    def set_jpeg_quality(self, quality: int):
+        config = self._load_config()
+        config["jpeg_quality"] = max(1, min(100, int(quality)))
+        self._save_config(config)
+
+    def get_request_rate(self) -> float:
+        """Max requests per second per CDN host (default 8)."""
+        try:
+            return max(0.5, float(self._load_config().get("request_rate", 8.0)))
+        except (TypeError, ValueError):
+            return 8.0
+
+    def set_request_rate(self, rate: float):
+        config = self._load_config()
+        config["request_rate"] = max(0.5, float(rate))
+        self._save_config(config)
+
+    def get_bandwidth_limit(self) -> int:
+        """Global download cap in KB/s across all runs (0 = unlimited)."""
+        try:
+            return max(0, int(self._load_config().get("bandwidth_limit_kbps", 0)))
+        except (TypeError, ValueError):
+            return 0
+
+    def set_bandwidth_limit(self, kbps: int):
+        config = self._load_config()
+        config["bandwidth_limit_kbps"] = max(0, int(kbps))
+        self._save_config(config)
+
+    def get_run_bandwidth_limit(self) -> int:
+        """Per-run download cap in KB/s (0 = unlimited)."""
+        try:
+            return max(0, int(self._load_config().get("run_bandwidth_limit_kbps", 0)))
+        except (TypeError, ValueError):
+            return 0
+
+    def set_run_bandwidth_limit(self, kbps: int):
+        config = self._load_config()
+        config["run_bandwidth_limit_kbps"] = max(0, int(kbps))
+        self._save_config(config)
+
+    def get_download_backend(self) -> str:
+        """'threads' (default) or 'asyncio' (needs aiohttp)."""
+        backend = self._load_config().get("download_backend", "threads")
+        return backend if backend in ("threads", "asyncio") else "threads"
+
+    def set_download_backend(self, backend: str):
+        config = self._load_config()
+        config["download_backend"] = backend
+        self._save_config(config)
+
+    def get_async_concurrency(self) -> int:
+        """Concurrent transfers for the asyncio backend (default 64)."""
+        try:
+            return max(1, int(self._load_config().get("async_concurrency", 64)))
+        except (TypeError, ValueError):
+            return 64
+
+    def set_async_concurrency(self, concurrency: int):
+        config = self._load_config()
+        config["async_concurrency"] = max(1, int(concurrency))
+        self._save_config(config)
+
+    def get_segment_threshold_mb(self) -> int:
+        """Reels at least this many MB download over parallel ranges (0 = off)."""
+        try:
+            return max(0, int(self._load_config().get("segment_threshold_mb", 8)))
+        except (TypeError, ValueError):
+            return 8
+
+    def set_segment_threshold_mb(self, megabytes: int):
+        config = self._load_config()
+        config["segment_threshold_mb"] = max(0, int(megabytes))
+        self._save_config(config)
+
+    def get_segment_connections(self) -> int:
+        """Parallel connections per segmented reel (default 4, 1 = off)."""
+        try:
+            return max(1, min(16, int(self._load_config().get("segment_connections", 4))))
+        except (TypeError, ValueError):
+            return 4
+
+    def set_segment_connections(self, connections: int):
+        config = self._load_config()
+        config["segment_connections"] = max(1, min(16, int(connections)))
+        self._save_config(config)
+
+    def get_network_capture(self) -> bool:
+        """Harvest post media from the page's API responses (default on)."""
+        return bool(self._load_config().get("network_capture", True))
+
+    def set_network_capture(self, enabled: bool):
+        config = self._load_config()
+        config["network_capture"] = bool(enabled)
+        self._save_config(config)
+
+    def get_scroll_pause_min(self) -> float:
+        """Shortest pause between grid scrolls in seconds (default 0.3)."""
+        try:
+            return max(0.0, min(10.0, float(self._load_config().get("scroll_pause_min", 0.3))))
+        except (TypeError, ValueError):
+            return 0.3
+
+    def set_scroll_pause_min(self, seconds: float):
+        config = self._load_config()
+        config["scroll_pause_min"] = max(0.0, min(10.0, float(seconds)))
+        self._save_config(config)
+
+    def get_scroll_wait_max(self) -> float:
+        """Longest wait for new grid tiles after a scroll (default 8 s)."""
+        try:
+            return max(1.0, min(60.0, float(self._load_config().get("scroll_wait_max", 8.0))))
+        except (TypeError, ValueError):
+            return 8.0
+
+    def set_scroll_wait_max(self, seconds: float):
+        config = self._load_config()
+        config["scroll_wait_max"] = max(1.0, min(60.0, float(seconds)))
+        self._save_config(config)
+
+    def get_grid_end_checks(self) -> int:
+        """Idle scrolls at the page bottom that end collection (default 3)."""
+        try:
+            return max(1, min(20, int(self._load_config().get("grid_end_checks", 3))))
+        except (TypeError, ValueError):
+            return 3
+
+    def set_grid_end_checks(self, checks: int):
+        config = self._load_config()
+        config["grid_end_checks"] = max(1, min(20, int(checks)))
+        self._save_config(config)
+
+    def get_grid_stall_limit(self) -> int:
+        """Scrolls without new posts before collection gives up (default 8)."""
+        try:
+            return max(1, min(50, int(self._load_config().get("grid_stall_limit", 8))))
+        except (TypeError, ValueError):
+            return 8
+
+    def set_grid_stall_limit(self, scrolls: int):
+        config = self._load_config()
+        config["grid_stall_limit"] = max(1, min(50, int(scrolls)))
+        self._save_config(config)
+
+    def get_browser_workers(self) -> int:
+        """Logged-in Firefox instances visiting posts in parallel (default 1)."""
+        try:
+            return max(1, min(8, int(self._load_config().get("browser_workers", 1))))
+        except (TypeError, ValueError):
+            return 1
+
+    def set_browser_workers(self, workers: int):
+        config = self._load_config()
+        config["browser_workers"] = max(1, min(8, int(workers)))
+        self._save_config(config)
+
+    def get_browser_mode(self) -> str:
+        """'standard' (default, visible window) or 'lean' (headless, no media bytes)."""
+        mode = self._load_config().get("browser_mode", "standard")
+        return mode if mode in ("standard", "lean") else "standard"
+
+    def set_browser_mode(self, mode: str):
+        config = self._load_config()
+        config["browser_mode"] = mode
+        self._save_config(config)
+
+    def get_reuse_session(self) -> bool:
+        """Restore the saved browser session instead of logging in (default on)."""
+        return bool(self._load_config().get("reuse_session", True))
+
+    def set_reuse_session(self, enabled: bool):
+        config = self._load_config()
+        config["reuse_session"] = bool(enabled)
+        self._save_config(config)
+
     def get_remember_me(self) -> bool:
         return self._load_config().get("remember_me", False)
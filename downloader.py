@@ -4,19 +4,67 @@ Handles file downloads with retry logic, smart naming, duplicate detection,
 directory management, and progress/time tracking.
 """
 
+import os
 import re
+import sys
+import json
 import time
+import queue
+import shutil
+import hashlib
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from PIL import Image
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from file_writer import MediaWriter, WriteStats, create_sized, iter_response, truncate_file
+from cdn_url import asset_key
+from http_session import HttpClient
+from manifest import ContentIndex, DownloadManifest
+from media_format import EXTENSIONS, sniff, validate
+from rate_limiter import BandwidthLimiter, RateLimiter, ThroughputMeter
+from transcoder import Transcoder
+
+
+class DownloadResult(NamedTuple):
+    """A finished file: content digest, final path, sniffed format, size."""
+    digest: str
+    path: Path
+    kind: Optional[str]
+    size: int
 
 
 class DownloadManager:
     """Downloads media files with retry, deduplication, and smart naming."""
 
-    def __init__(self, base_dir: str, target_username: str, log_callback=None):
+    DEFAULT_WORKERS = 4      # concurrent download threads
+    QUEUE_SIZE = 64          # pending jobs before enqueue blocks the scraper
+    PART_SUFFIX = ".part"    # in-progress download
+    META_SUFFIX = ".part.json"  # resume validators for a .part file
+    LINK_MODES = ("off", "hardlink", "reflink")   # identical-content handling
+    SEGMENT_THRESHOLD = 8 * 1024 * 1024   # reels at least this big are split
+    SEGMENT_CONNECTIONS = 4               # parallel ranges per large reel
+    SEGMENT_MIN = 2 * 1024 * 1024         # never split finer than this
+    MEDIA_SUFFIXES = tuple(set(EXTENSIONS.values()))
+
+    def __init__(
+        self,
+        base_dir: str,
+        target_username: str,
+        log_callback=None,
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = QUEUE_SIZE,
+        link_mode: str = "off",
+        transcode_policy: str = "jpeg",
+        jpeg_quality: int = 100,
+        bandwidth_limit: float = 0,
+        segment_threshold: int = SEGMENT_THRESHOLD,
+        segment_connections: int = SEGMENT_CONNECTIONS,
+    ):
         self.target_username = self._sanitize(target_username)
-        self.base_dir = Path(base_dir) / "downloads" / self.target_username
+        self.root_dir = Path(base_dir) / "downloads"
+        self.base_dir = self.root_dir / self.target_username
         self.images_dir = self.base_dir / "images"
         self.reels_dir = self.base_dir / "reels"
         self.log = log_callback or print
@@ -29,11 +77,45 @@ class DownloadManager:
         self.total_images = 0
         self.total_reels = 0
         self.failed_downloads = 0
+        self.invalid_files = 0
         self.start_time = None
 
-        # Duplicate tracking
+        # Duplicate tracking — backed by the per-profile manifest
+        self.manifest = DownloadManifest(self.base_dir)
         self.downloaded_files: set = set()
+        self._in_flight: set = set()
         self._load_existing_files()
+        # Same CDN asset at another size / signature → same file
+        self.downloaded_assets = self.manifest.done_asset_keys()
+        self._asset_in_flight: Dict[str, str] = {}      # stem → asset key
+        self.completed_posts = self.manifest.completed_posts()
+        self._open_posts: Dict[str, dict] = {}
+
+        # Content-addressed dedup across every profile under downloads/
+        self.content_index = ContentIndex(self.root_dir)
+        self.link_mode = link_mode if link_mode in self.LINK_MODES else "off"
+        self.linked_files = 0
+        self.bytes_saved = 0
+
+        # Bandwidth: per-run cap on top of the global one, plus live meter
+        self.bandwidth = BandwidthLimiter(bandwidth_limit)
+        self.throughput = ThroughputMeter()
+        self.write_stats = WriteStats()
+
+        # Large reels: parallel byte ranges (0 threshold / 1 connection = off)
+        self.segment_threshold = max(0, int(segment_threshold))
+        self.segment_connections = max(1, int(segment_connections))
+        self._segment_pool: Optional[ThreadPoolExecutor] = None
+
+        # Off-thread WebP → JPEG stage (process pool)
+        self.transcoder = Transcoder(transcode_policy, jpeg_quality, log_callback=self.log)
+
+        # Worker pool — the bot enqueues, workers stream to disk
+        self.worker_count = max(1, int(workers))
+        self._jobs: queue.Queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
 
     # ── Helpers ────────────────────────────────────────────────
 
@@ -43,11 +125,31 @@ class DownloadManager:
         return re.sub(r'[<>:"/\\|?*]', "_", name).strip(". ")
 
     def _load_existing_files(self):
-        """Index already-downloaded filenames to skip duplicates."""
-        for d in (self.images_dir, self.reels_dir):
-            for f in d.iterdir():
-                if f.is_file():
-                    self.downloaded_files.add(f.name)
+        """Index already-downloaded file stems to skip duplicates.
+
+        Stems (names without extension) are tracked because the extension
+        is only known once the first bytes arrive. Reads the manifest; the
+        media folders are only scanned once, to seed a brand-new manifest
+        from files saved by older versions; truncated ones are left out so
+        they get downloaded again. Unfinished ``.part`` files are never
+        counted, so they get resumed.
+        """
+        if self.manifest.is_new:
+            kinds = {ext: kind for kind, ext in EXTENSIONS.items()}
+            existing, broken = [], 0
+            for d in (self.images_dir, self.reels_dir):
+                for f in d.iterdir():
+                    suffix = f.suffix.lower()
+                    if not f.is_file() or suffix not in self.MEDIA_SUFFIXES:
+                        continue
+                    if validate(f, kinds[suffix]) is None:
+                        existing.append(f)
+                    else:
+                        broken += 1
+            self.manifest.import_files(self.target_username, existing)
+            if broken:
+                self.log(f"{broken} existing file(s) look truncated — they will be re-downloaded")
+        self.downloaded_files = {Path(n).stem for n in self.manifest.done_filenames()}
 
     # ── Timer ──────────────────────────────────────────────────
 
@@ -67,103 +169,780 @@ class DownloadManager:
             return f"{m}m {s}s"
         return f"{s}s"
 
+    def _reserve(self, stem: str, url: Optional[str] = None) -> bool:
+        """Claim a file stem (and the CDN asset behind ``url``) for download.
+
+        False if the stem or the asset — at any size or signature — is
+        already saved or in flight.
+        """
+        key = asset_key(url) if url else ""
+        with self._lock:
+            if stem in self.downloaded_files or stem in self._in_flight:
+                return False
+            if key and (key in self.downloaded_assets
+                        or key in self._asset_in_flight.values()):
+                return False
+            self._in_flight.add(stem)
+            if key:
+                self._asset_in_flight[stem] = key
+            return True
+
+    def _release(self, stem: str, ok: bool, counter: str):
+        """Finish a reserved file stem and update statistics."""
+        with self._lock:
+            self._in_flight.discard(stem)
+            key = self._asset_in_flight.pop(stem, None)
+            if ok:
+                self.downloaded_files.add(stem)
+                if key:
+                    self.downloaded_assets.add(key)
+                setattr(self, counter, getattr(self, counter) + 1)
+            else:
+                self.failed_downloads += 1
+
+    def _record(self, post_id: str, index: int, kind: str, stem: str,
+                url: str, res: Optional["DownloadResult"]):
+        """Persist the outcome of one media file to the manifest."""
+        try:
+            if res is not None:
+                self.manifest.record_media(
+                    post_id, index, kind, res.path.name, url, res.size,
+                    DownloadManifest.STATUS_DONE, res.digest, asset_key(url),
+                )
+            else:
+                self.manifest.record_media(
+                    post_id, index, kind, stem, url, None, DownloadManifest.STATUS_FAILED,
+                )
+        except Exception as exc:
+            self.log(f"Manifest write failed: {str(exc)[:80]}")
+
+    # ── Post tracking ──────────────────────────────────────────
+
+    def is_post_complete(self, post_id: str) -> bool:
+        """True if every media item of the post was saved in a past run."""
+        return post_id in self.completed_posts
+
+    def begin_post(self, post_id: str, url: Optional[str] = None):
+        """Start tracking the queued media of a post."""
+        with self._lock:
+            self._open_posts[post_id] = {
+                "pending": 0, "failed": False, "count": None, "url": url,
+            }
+
+    def end_post(self, post_id: str, media_count: int, ok: bool = True):
+        """Seal a post; it is marked complete once its queued jobs succeed."""
+        with self._lock:
+            state = self._open_posts.get(post_id)
+            if state is None:
+                return
+            state["count"] = media_count
+            state["failed"] = state["failed"] or not ok or media_count == 0
+            done = state["pending"] == 0
+        if done:
+            self._finish_post(post_id)
+
+    def _job_done(self, group: str, ok: bool):
+        with self._lock:
+            state = self._open_posts.get(group)
+            if state is None:
+                return
+            state["pending"] -= 1
+            state["failed"] = state["failed"] or not ok
+            done = state["pending"] == 0 and state["count"] is not None
+        if done:
+            self._finish_post(group)
+
+    def _finish_post(self, post_id: str):
+        with self._lock:
+            state = self._open_posts.pop(post_id, None)
+        if state is None:
+            return
+        if state["failed"]:
+            status = DownloadManifest.STATUS_PARTIAL
+        else:
+            status = DownloadManifest.STATUS_COMPLETE
+            self.completed_posts.add(post_id)
+        try:
+            self.manifest.mark_post(post_id, status, state["count"] or 0, state["url"])
+        except Exception as exc:
+            self.log(f"Manifest write failed: {str(exc)[:80]}")
+
+    # ── Worker pool ────────────────────────────────────────────
+
+    def start_workers(self):
+        """Spawn the download worker threads (no-op if already running)."""
+        if self._workers:
+            return
+        self._cancelled.clear()
+        for n in range(self.worker_count):
+            t = threading.Thread(
+                target=self._worker_loop,
+                name=f"download-worker-{n + 1}",
+                daemon=True,
+            )
+            t.start()
+            self._workers.append(t)
+
+    def enqueue_image(self, url: str, post_id: str, index: int = 0,
+                      group: Optional[str] = None):
+        """Queue an image for background download and return immediately.
+
+        ``group`` is the post the file counts towards (default ``post_id``).
+        """
+        self._enqueue(("image", url, post_id, index, group or post_id))
+
+    def enqueue_reel(self, url: str, post_id: str, group: Optional[str] = None):
+        """Queue a reel for background download and return immediately."""
+        self._enqueue(("reel", url, post_id, 0, group or post_id))
+
+    def _count_pending(self, group: str):
+        with self._lock:
+            state = self._open_posts.get(group)
+            if state is not None:
+                state["pending"] += 1
+
+    def _enqueue(self, job: Tuple[str, str, str, int, str]):
+        if not self._workers:
+            self.start_workers()
+        self._count_pending(job[4])
+        # Bounded queue: blocks the scraper only when workers fall behind
+        while not self._cancelled.is_set():
+            try:
+                self._jobs.put(job, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _worker_loop(self):
+        while True:
+            job = self._jobs.get()
+            try:
+                if job is None:
+                    return
+                if self._cancelled.is_set():
+                    continue
+                kind, url, post_id, index, group = job
+                ok = False
+                try:
+                    if kind == "reel":
+                        ok = self.download_reel(url, post_id)
+                    else:
+                        ok = self.download_image(url, post_id, index)
+                finally:
+                    self._job_done(group, ok)
+            except Exception as exc:
+                self.log(f"Worker error: {str(exc)[:80]}")
+            finally:
+                self._jobs.task_done()
+
+    def pending_jobs(self) -> int:
+        return self._jobs.qsize()
+
+    def join(self, cancel: bool = False):
+        """Drain the job queue and stop the workers.
+
+        With ``cancel=True`` queued jobs are discarded and running
+        transfers are left to finish on their daemon threads.
+        """
+        if not self._workers:
+            return
+        if cancel:
+            self._cancelled.set()
+            while True:
+                try:
+                    self._jobs.get_nowait()
+                    self._jobs.task_done()
+                except queue.Empty:
+                    break
+        else:
+            pending = self._jobs.qsize()
+            if pending:
+                self.log(f"Waiting for {pending} queued download(s)…")
+
+        for _ in self._workers:
+            self._jobs.put(None)
+        if not cancel:
+            for t in self._workers:
+                t.join()
+        self._workers.clear()
+        self._stop_segment_pool(cancel)
+        self.transcoder.join(cancel=cancel)
+
     # ── Public download API ────────────────────────────────────
 
     def download_image(self, url: str, post_id: str, index: int = 0) -> bool:
-        """Download a single image with smart naming."""
-        filename = f"{self.target_username}_img_{post_id}_{index + 1}.jpg"
-        if filename in self.downloaded_files:
-            self.log(f"Skipping duplicate: {filename}")
+        """Download a single image with smart naming.
+
+        The extension follows the real format sniffed from the stream; a
+        WebP that is going to be re-encoded becomes ``.jpg`` only once the
+        conversion has finished.
+        """
+        stem = f"{self.target_username}_img_{post_id}_{index + 1}"
+        if not self._reserve(stem, url):
+            self.log(f"Skipping duplicate: {stem}")
             return True
 
-        ok = self._download(url, self.images_dir / filename)
+        res = self._link_known_source(url, self.images_dir / stem)
+        if res is not None:
+            return self._complete(post_id, index, "image", stem, url, res)
+        res = self._download(url, self.images_dir / stem, self._image_ext)
+        return self._publish_image(post_id, index, stem, url, res)
+
+    def _publish_image(self, post_id: str, index: int, stem: str, url: str,
+                       res: Optional["DownloadResult"]) -> bool:
+        """Link, or transcode and then record, a fresh image download.
+
+        The file is only indexed and recorded in the manifest once it is
+        final, and the conversion keeps its post open until then. A failed
+        or cancelled conversion leaves the ``.webp`` on disk but records
+        the file as failed, so the next run downloads it again.
+        """
+        linked = self._link_duplicate(res, url) if res is not None else None
+        if res is None or linked is not None:
+            return self._complete(post_id, index, "image", stem, url, linked)
+        self._count_pending(post_id)
+
+        def finished(final: Optional[Path]):
+            done = None
+            if final is not None:
+                done = res if final == res.path else res._replace(
+                    path=final, kind="jpeg", size=final.stat().st_size,
+                )
+                self._index_content(res.digest, url, final)
+            self._job_done(post_id, self._complete(post_id, index, "image", stem, url, done))
+
+        self.transcoder.submit(res.path, res.kind, finished)
+        return True
+
+    def _publish_reel(self, res: Optional["DownloadResult"],
+                      url: str) -> Optional["DownloadResult"]:
+        """Link or index a fresh reel download; returns the file to record."""
+        if res is None:
+            return None
+        linked = self._link_duplicate(res, url)
+        if linked is not None:
+            return linked
+        self._index_content(res.digest, url, res.path)
+        return res
+
+    def _complete(self, post_id: str, index: int, kind: str, stem: str,
+                  url: str, res: Optional["DownloadResult"]) -> bool:
+        """Log, record and release a finished image or reel."""
+        ok = res is not None
+        label, counter = ("Image", "total_images") if kind == "image" else ("Reel", "total_reels")
         if ok:
-            # Convert WebP-disguised-as-jpg to real high-quality JPEG
-            self._ensure_jpeg(self.images_dir / filename)
-            self.total_images += 1
-            self.downloaded_files.add(filename)
-            self.log(f"Image saved: {filename}")
+            self.log(f"{label} saved: {res.path.name}")
         else:
-            self.failed_downloads += 1
-            self.log(f"Failed: {filename}")
+            self.log(f"Failed{'' if kind == 'image' else ' reel'}: {stem}")
+        self._record(post_id, index, kind, stem, url, res)
+        self._release(stem, ok, counter)
         return ok
 
-    def _ensure_jpeg(self, filepath: Path):
-        """If the file is actually WebP (RIFF header), convert to real JPEG."""
-        try:
-            with open(filepath, "rb") as f:
-                header = f.read(4)
-            if header == b"RIFF":  # WebP signature
-                img = Image.open(filepath)
-                if img.mode in ("RGBA", "P", "LA", "PA"):
-                    img = img.convert("RGB")
-                img.save(str(filepath), "JPEG", quality=100, optimize=True)
-                img.close()
-                self.log(f"    Converted WebP -> JPEG (quality 95%)")
-        except Exception as exc:
-            self.log(f"    Format conversion note: {str(exc)[:80]}")
-
     def download_reel(self, url: str, post_id: str) -> bool:
         """Download a reel video."""
-        filename = f"{self.target_username}_reel_{post_id}.mp4"
-        if filename in self.downloaded_files:
-            self.log(f"Skipping duplicate reel: {filename}")
+        stem = f"{self.target_username}_reel_{post_id}"
+        if not self._reserve(stem, url):
+            self.log(f"Skipping duplicate reel: {stem}")
             return True
 
-        ok = self._download(url, self.reels_dir / filename)
-        if ok:
-            self.total_reels += 1
-            self.downloaded_files.add(filename)
-            self.log(f"Reel saved: {filename}")
-        else:
-            self.failed_downloads += 1
-            self.log(f"Failed reel: {filename}")
-        return ok
+        res = self._link_known_source(url, self.reels_dir / stem)
+        if res is None:
+            res = self._download_segmented(url, self.reels_dir / stem, self._reel_ext)
+            if res is None:
+                res = self._download(url, self.reels_dir / stem, self._reel_ext)
+            res = self._publish_reel(res, url)
+        return self._complete(post_id, 0, "reel", stem, url, res)
+
+    @staticmethod
+    def _image_ext(kind: Optional[str]) -> str:
+        return EXTENSIONS.get(kind, ".jpg")
+
+    @staticmethod
+    def _reel_ext(kind: Optional[str]) -> str:
+        return EXTENSIONS.get(kind, ".mp4")
+
+    # ── Content-addressed dedup ────────────────────────────────
+
+    def _link_known_source(self, url: str, stem: Path) -> Optional["DownloadResult"]:
+        """Link content already fetched from this URL instead of downloading."""
+        if self.link_mode == "off":
+            return None
+        known = self.content_index.lookup_source(asset_key(url))
+        if not known:
+            return None
+        digest, src = known
+        dest = stem.with_name(stem.name + src.suffix)
+        if src.resolve() == dest.resolve() or not self._link_file(src, dest, fallback_copy=True):
+            return None
+        size = src.stat().st_size
+        with self._lock:
+            self.bytes_saved += size
+        self.log(f"    Linked known content -> {dest.name}")
+        return DownloadResult(digest, dest, None, size)
+
+    def _link_duplicate(self, res: "DownloadResult", url: str) -> Optional["DownloadResult"]:
+        """Swap a fresh download for a link if the content is already stored.
+
+        The stored copy may have been re-encoded since (a WebP indexed under
+        its ``.jpg``), so the link takes the stored file's extension and the
+        fresh download is removed. Returns the linked file, or None when
+        the download stays as it is.
+        """
+        if self.link_mode == "off":
+            return None
+        src = self.content_index.lookup(res.digest)
+        if src is None or src.resolve() == res.path.resolve():
+            return None
+        dest = res.path.with_suffix(src.suffix)
+        if src.resolve() != dest.resolve():
+            if not self._link_file(src, dest, fallback_copy=False):
+                return None
+        if dest != res.path:
+            res.path.unlink(missing_ok=True)
+        size = dest.stat().st_size
+        with self._lock:
+            self.bytes_saved += size
+        self.content_index.add(res.digest, src, asset_key(url))
+        self.log(f"    Duplicate content linked -> {dest.name}")
+        kind = res.kind if dest.suffix == res.path.suffix else self._sniff_part(dest)
+        return res._replace(path=dest, kind=kind, size=size)
+
+    def _index_content(self, digest: str, url: str, dest: Path):
+        try:
+            self.content_index.add(digest, dest, asset_key(url))
+        except Exception as exc:
+            self.log(f"Content index write failed: {str(exc)[:80]}")
+
+    def _link_file(self, src: Path, dest: Path, fallback_copy: bool) -> bool:
+        """Atomically replace ``dest`` with a hard link / reflink of ``src``."""
+        tmp = dest.with_name(dest.name + ".link")
+        tmp.unlink(missing_ok=True)
+        try:
+            if self.link_mode == "hardlink":
+                os.link(src, tmp)
+            elif not self._reflink(src, tmp):
+                if not fallback_copy:
+                    return False
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, dest)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return False
+        with self._lock:
+            self.linked_files += 1
+        return True
+
+    @staticmethod
+    def _reflink(src: Path, dest: Path) -> bool:
+        """Copy-on-write clone (Btrfs/XFS FICLONE); False if unsupported."""
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            import fcntl
+            FICLONE = 0x40049409
+            with open(src, "rb") as s, open(dest, "wb") as d:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            return True
+        except OSError:
+            dest.unlink(missing_ok=True)
+            return False
 
     # ── Core download with retry ───────────────────────────────
 
-    def _download(self, url: str, filepath: Path, retries: int = 3) -> bool:
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) "
-                "Gecko/20100101 Firefox/128.0"
-            ),
-            "Referer": "https://www.instagram.com/",
-            "Accept": "*/*",
-        }
+    def _download(self, url: str, stem: Path, choose_ext: Callable[[Optional[str]], str],
+                  retries: int = 3) -> Optional["DownloadResult"]:
+        """Stream ``url`` into ``<stem>.part`` and rename it on completion.
+
+        The container is sniffed from the first chunk and ``Content-Type``
+        and ``choose_ext`` maps it to the final extension, so no file is
+        reopened afterwards. A leftover ``.part`` from an earlier attempt
+        or run is resumed with an HTTP ``Range`` request; ``If-Range``
+        makes the server send the whole file instead if it changed since.
+        The SHA-256 of the content is computed as the bytes stream through,
+        and the body is written through a preallocating ``MediaWriter``.
+        """
+        client = HttpClient.shared()
+        part, meta = self._part_paths(stem)
 
         for attempt in range(retries):
             try:
-                resp = requests.get(url, headers=headers, timeout=90, stream=True)
-                resp.raise_for_status()
+                offset, state, headers = self._resume_request(part, meta)
 
-                with open(filepath, "wb") as fh:
-                    for chunk in resp.iter_content(chunk_size=8192):
-                        if chunk:
-                            fh.write(chunk)
+                # Context manager returns the socket to the keep-alive pool
+                with client.get(url, headers=headers, timeout=90, stream=True) as resp:
+                    if resp.status_code == 416:
+                        done = self._range_exhausted(
+                            part, meta, stem, choose_ext, offset, state, resp.headers,
+                        )
+                        if done is not None:
+                            return done
+                        continue
+                    resp.raise_for_status()
 
-                if filepath.exists() and filepath.stat().st_size > 0:
-                    return True
+                    start, total = self._response_span(resp.status_code, resp.headers)
+                    offset, hasher, kind, sniffed = self._stream_start(
+                        part, stem, state, offset, start, resp.status_code,
+                    )
 
-                filepath.unlink(missing_ok=True)
+                    with self._writer(part, meta, offset, total, resp.headers) as out:
+                        for chunk in iter_response(resp, self._remaining(total, offset),
+                                                   self.write_stats, self._chunk_limit()):
+                            if not sniffed:
+                                kind, sniffed = sniff(chunk, resp.headers.get("Content-Type")), True
+                                self._write_part_meta(meta, resp.headers, total, kind)
+                            hasher.update(chunk)
+                            out.write(chunk)
+                            self._throttle(len(chunk))
+                    size = out.position
+
+                if size > 0 and (total is None or size >= total):
+                    if self._validate_part(part, kind, size, total):
+                        return self._finish_part(
+                            part, meta, stem.with_name(stem.name + choose_ext(kind)),
+                            hasher.hexdigest(), kind, size,
+                        )
+                    self._discard_part(part, meta)
+                elif size == 0:
+                    self._discard_part(part, meta)
+                else:
+                    self.log(
+                        f"Attempt {attempt + 1}/{retries} failed: "
+                        f"short read ({size}/{total} bytes)"
+                    )
 
             except requests.RequestException as exc:
-                wait = (2 ** attempt) * 2
+                status = getattr(exc.response, "status_code", None)
+                if status in RateLimiter.THROTTLE_STATUS:
+                    # The shared limiter already holds every worker off this
+                    # host for Retry-After; the next acquire() waits it out
+                    wait = 0
+                else:
+                    wait = (2 ** attempt) * 2
                 self.log(
                     f"Attempt {attempt + 1}/{retries} failed: "
                     f"{str(exc)[:80]}"
                 )
-                if attempt < retries - 1:
+                if attempt < retries - 1 and wait:
                     self.log(f"Retrying in {wait}s…")
                     time.sleep(wait)
             except Exception as exc:
                 self.log(f"Unexpected error: {str(exc)[:80]}")
                 break
 
+        return None
+
+    # ── Segmented downloads ────────────────────────────────────
+
+    def _probe_size(self, url: str) -> Optional[Tuple[int, Optional[str], Optional[str], str]]:
+        """(size, validator, Content-Type, final URL) if ``url`` is worth splitting."""
+        if self.segment_connections < 2 or not self.segment_threshold:
+            return None
+        try:
+            resp = HttpClient.shared().head(url, timeout=15, allow_redirects=True)
+            resp.raise_for_status()
+        except requests.RequestException:
+            return None
+        length = resp.headers.get("Content-Length", "")
+        if not length.isdigit() or int(length) < self.segment_threshold:
+            return None
+        if resp.headers.get("Accept-Ranges", "").lower() == "none":
+            return None
+        etag = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+        return int(length), etag, resp.headers.get("Content-Type"), resp.url
+
+    def _download_segmented(self, url: str, stem: Path,
+                            choose_ext: Callable[[Optional[str]], str]) -> Optional["DownloadResult"]:
+        """Fetch a large file as parallel byte ranges into one preallocated ``.part``.
+
+        Returns None whenever the single-stream path should handle the URL
+        instead: the file is small, a single-stream ``.part`` is waiting to
+        be resumed, the server ignores ``Range`` (or the file changed
+        mid-download), or a segment kept failing.
+        """
+        part, meta = self._part_paths(stem)
+        if part.exists() and not self._read_part_meta(meta).get("segmented"):
+            return None
+        probe = self._probe_size(url)
+        if probe is None:
+            return None
+        size, etag, content_type, target = probe
+
+        count = max(1, min(self.segment_connections, size // self.SEGMENT_MIN))
+        if count < 2:
+            return None
+        bounds = [(i * size // count, (i + 1) * size // count - 1) for i in range(count)]
+        create_sized(part, size)
+        self.write_stats.add_file(size)
+        self._write_part_meta(meta, {"ETag": etag}, size, None, segmented=True)
+        self.log(f"    Segmented download: {stem.name} "
+                 f"({size / (1024 * 1024):.1f} MB over {count} connections)")
+
+        abort = threading.Event()
+        pool = self._segments()
+        futures = [
+            pool.submit(self._fetch_segment, target, part, start, end, etag, abort)
+            for start, end in bounds
+        ]
+        results = [f.result() for f in futures]
+        if not all(r == "ok" for r in results):
+            self._discard_part(part, meta)
+            if "no-range" in results:
+                self.log("    Server ignored Range — falling back to a single stream")
+            return None
+
+        with open(part, "rb") as fh:
+            kind = sniff(fh.read(16), content_type)
+        if not self._validate_part(part, kind, size, size):
+            self._discard_part(part, meta)
+            return None
+        return self._finish_part(
+            part, meta, stem.with_name(stem.name + choose_ext(kind)),
+            self._hash_file(part), kind, size,
+        )
+
+    def _fetch_segment(self, url: str, part: Path, start: int, end: int,
+                       etag: Optional[str], abort: threading.Event,
+                       retries: int = 3) -> str:
+        """Fill bytes ``start..end`` of ``part``; returns 'ok', 'no-range' or 'failed'."""
+        client = HttpClient.shared()
+        pos = start
+        for attempt in range(retries):
+            if abort.is_set() or self._cancelled.is_set():
+                return "failed"
+            headers = {"Range": f"bytes={pos}-{end}"}
+            if etag:
+                headers["If-Range"] = etag
+            writer = MediaWriter(part, pos, stats=self.write_stats, resize=False)
+            try:
+                with client.get(url, headers=headers, timeout=90, stream=True) as resp:
+                    resp.raise_for_status()
+                    if resp.status_code != 206 or self._response_span(206, resp.headers)[0] != pos:
+                        # 200: Range unsupported, or If-Range saw a changed file
+                        abort.set()
+                        return "no-range"
+                    with writer:
+                        for chunk in iter_response(resp, end + 1 - pos, self.write_stats,
+                                                   self._chunk_limit()):
+                            if abort.is_set():
+                                break
+                            if writer.position + len(chunk) > end + 1:
+                                chunk = chunk[:end + 1 - writer.position]
+                            writer.write(chunk)
+                            self._throttle(len(chunk))
+                            if writer.position > end:
+                                break
+                if writer.position > end:
+                    return "ok"
+            except requests.RequestException as exc:
+                status = getattr(exc.response, "status_code", None)
+                self.log(f"    Segment {start}-{end} attempt {attempt + 1}/{retries} "
+                         f"failed: {str(exc)[:60]}")
+                if attempt < retries - 1 and status not in RateLimiter.THROTTLE_STATUS:
+                    time.sleep(2 ** attempt)
+            except OSError as exc:
+                self.log(f"    Segment write failed: {str(exc)[:80]}")
+                break
+            pos = writer.position
+        abort.set()
+        return "failed"
+
+    def _segments(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._segment_pool is None:
+                self._segment_pool = ThreadPoolExecutor(
+                    max_workers=self.worker_count * self.segment_connections,
+                    thread_name_prefix="segment",
+                )
+            return self._segment_pool
+
+    def _stop_segment_pool(self, cancel: bool = False):
+        with self._lock:
+            pool, self._segment_pool = self._segment_pool, None
+        if pool is not None:
+            pool.shutdown(wait=not cancel, cancel_futures=cancel)
+
+    def _throttle(self, nbytes: int):
+        """Charge received bytes to the global and per-run bandwidth caps."""
+        self.throughput.add(nbytes)
+        BandwidthLimiter.shared().consume(nbytes)
+        self.bandwidth.consume(nbytes)
+
+    def _chunk_limit(self) -> Optional[int]:
+        """Largest network read when a bandwidth cap is set (its bucket depth)."""
+        caps = [b.burst for b in (BandwidthLimiter.shared(), self.bandwidth) if b.enabled]
+        return int(min(caps)) if caps else None
+
+    def current_throughput(self) -> float:
+        """Download rate over the last few seconds, in bytes per second."""
+        return self.throughput.rate()
+
+    def get_write_stats(self) -> dict:
+        """Disk write counters for this run (see ``WriteStats.as_dict``)."""
+        return self.write_stats.as_dict()
+
+    # ── Partial-file helpers ───────────────────────────────────
+
+    def _part_paths(self, stem: Path) -> Tuple[Path, Path]:
+        return (stem.with_name(stem.name + self.PART_SUFFIX),
+                stem.with_name(stem.name + self.META_SUFFIX))
+
+    def _resume_request(self, part: Path, meta: Path) -> Tuple[int, dict, dict]:
+        """(offset, saved sidecar state, request headers) for a new attempt."""
+        offset = part.stat().st_size if part.exists() else 0
+        state = self._read_part_meta(meta) if offset else {}
+        if state.get("segmented"):
+            # Holes from an interrupted segmented download: start over
+            self._discard_part(part, meta)
+            return 0, {}, {}
+        written = state.get("written")
+        if isinstance(written, int) and written < offset:
+            # Preallocated file left by a crash: drop the unwritten tail
+            truncate_file(part, written)
+            offset = written
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if state.get("etag"):
+                headers["If-Range"] = state["etag"]
+        return offset, state, headers
+
+    def _range_exhausted(self, part: Path, meta: Path, stem: Path, choose_ext,
+                         offset: int, state: dict, headers) -> Optional["DownloadResult"]:
+        """Handle 416: publish the ``.part`` if it is complete, else drop it."""
+        total = self._range_total(headers.get("Content-Range"))
+        if total is not None and total == offset:
+            kind = state.get("kind") or self._sniff_part(part)
+            if not self._validate_part(part, kind, offset, total):
+                self._discard_part(part, meta)
+                return None
+            return self._finish_part(
+                part, meta, stem.with_name(stem.name + choose_ext(kind)),
+                self._hash_file(part), kind, offset,
+            )
+        self._discard_part(part, meta)
+        return None
+
+    def _stream_start(self, part: Path, stem: Path, state: dict, offset: int,
+                      start: int, status: int):
+        """Decide between append and restart; returns (offset, hasher, kind, sniffed)."""
+        if status != 206 or start != offset:
+            offset = 0          # server ignored Range → start over
+        if offset:
+            self.log(f"Resuming {stem.name} at {offset // 1024} KB")
+            kind = state.get("kind") or self._sniff_part(part)
+            return offset, self._hash_file(part, hexdigest=False), kind, True
+        return 0, hashlib.sha256(), None, False
+
+    @staticmethod
+    def _range_total(content_range: Optional[str]) -> Optional[int]:
+        """Total length from a ``Content-Range`` header (``bytes a-b/N``)."""
+        if content_range and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1].strip()
+            if total.isdigit():
+                return int(total)
+        return None
+
+    @staticmethod
+    def _remaining(total: Optional[int], offset: int) -> Optional[int]:
+        return None if total is None else max(total - offset, 0)
+
+    def _writer(self, part: Path, meta: Path, offset: int, total: Optional[int],
+                headers) -> MediaWriter:
+        """Writer for ``part`` that checkpoints progress into its sidecar."""
+        state = {}
+
+        def checkpoint(written: int):
+            # The sidecar already holds the sniffed kind by the first flush
+            if "kind" not in state:
+                state["kind"] = self._read_part_meta(meta).get("kind")
+            self._write_part_meta(meta, headers, total, state["kind"], written)
+
+        return MediaWriter(part, offset, total, self.write_stats, checkpoint)
+
+    def _response_span(self, status: int, headers) -> Tuple[int, Optional[int]]:
+        """Return (first byte offset, full file length) of a response."""
+        if status == 206:
+            cr = headers.get("Content-Range", "")
+            m = re.match(r"bytes\s+(\d+)-\d+/", cr)
+            return (int(m.group(1)) if m else -1), self._range_total(cr)
+        length = headers.get("Content-Length")
+        return 0, (int(length) if length and length.isdigit() else None)
+
+    @staticmethod
+    def _read_part_meta(meta: Path) -> dict:
+        try:
+            return json.loads(meta.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_part_meta(meta: Path, headers, total: Optional[int], kind: Optional[str],
+                         written: Optional[int] = None, segmented: bool = False):
+        etag = headers.get("ETag") or headers.get("Last-Modified")
+        state = {"etag": etag, "total": total, "kind": kind}
+        if written is not None:
+            state["written"] = written
+        if segmented:
+            state["segmented"] = True
+        try:
+            meta.write_text(json.dumps(state), encoding="utf-8")
+        except OSError:
+            pass
+
+    def _validate_part(self, part: Path, kind: Optional[str], size: int,
+                       total: Optional[int]) -> bool:
+        """Length and structural checks before a ``.part`` is published.
+
+        A failure is logged and counted; the caller drops the ``.part`` so
+        the next attempt downloads it again from scratch.
+        """
+        if total is not None and size != total:
+            problem = f"expected {total} bytes, got {size}"
+        else:
+            problem = validate(part, kind, size)
+        if problem is None:
+            return True
+        with self._lock:
+            self.invalid_files += 1
+        self.log(f"    Integrity check failed ({part.name}): {problem} — re-downloading")
         return False
 
+    @staticmethod
+    def _sniff_part(part: Path) -> Optional[str]:
+        """Sniff a file from its first bytes (e.g. a ``.part`` whose sidecar was lost)."""
+        with open(part, "rb") as fh:
+            return sniff(fh.read(16))
+
+    @staticmethod
+    def _discard_part(part: Path, meta: Path):
+        part.unlink(missing_ok=True)
+        meta.unlink(missing_ok=True)
+
+    @staticmethod
+    def _hash_file(path: Path, hexdigest: bool = True):
+        """SHA-256 of bytes already on disk (only needed when resuming)."""
+        hasher = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                hasher.update(block)
+        return hasher.hexdigest() if hexdigest else hasher
+
+    @staticmethod
+    def _finish_part(part: Path, meta: Path, filepath: Path, digest: str,
+                     kind: Optional[str], size: int) -> "DownloadResult":
+        """Atomically publish a completed ``.part`` under its final name."""
+        os.replace(part, filepath)
+        meta.unlink(missing_ok=True)
+        return DownloadResult(digest, filepath, kind, size)
+
     # ── Summary ────────────────────────────────────────────────
 
+    def _average_rate(self) -> str:
+        if not self.start_time or not self.throughput.total_bytes:
+            return ""
+        elapsed = max(time.time() - self.start_time, 1e-3)
+        return f" (avg {ThroughputMeter.format_rate(self.throughput.total_bytes / elapsed)})"
+
     def get_summary(self, total_posts: int = 0) -> str:
         elapsed = self.get_elapsed_time()
         status_text = "Completed Successfully" if self.failed_downloads == 0 else "Completed with Warnings"
@@ -179,6 +958,16 @@ class DownloadManager:
             f"Total Posts      : {total_posts}\n"
             f"Images Saved     : {self.total_images}\n"
             f"Reels Saved      : {self.total_reels}\n"
+            f"Download Workers : {self.worker_count}\n"
+            f"Throttle Events  : {RateLimiter.shared().throttle_events}\n"
+            f"Integrity Fails  : {self.invalid_files}\n"
+            f"Linked Duplicates: {self.linked_files} ({self.bytes_saved // 1024} KB saved)\n"
+            f"Transcoded       : {self.transcoder.converted} "
+            f"({self.transcoder.policy}, {self.transcoder.pending} pending, "
+            f"{self.transcoder.failed} failed)\n"
+            f"Data Downloaded  : {self.throughput.total_bytes / (1024 * 1024):.1f} MB"
+            f"{self._average_rate()}\n"
+            f"Disk Writes      : {self.write_stats.describe()}\n"
             f"Time Elapsed     : {elapsed}\n"
             f"Failed / Errors  : {self.failed_downloads}\n"
             "----------------------------------------"
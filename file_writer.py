@@ -0,0 +1,318 @@
+"""
+INSTAJECTION — Buffered Media Writer.
+Write path for streamed downloads: files are preallocated from
+Content-Length, network chunks are read with an adaptive size and
+coalesced in a reused buffer, so large reels hit the disk in a few big
+sequential writes instead of thousands of 8 KB ones. Counters are kept
+for the run summary and for benchmarking.
+"""
+
+import os
+import sys
+import time
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import requests
+from urllib3.exceptions import HTTPError as Urllib3Error, ReadTimeoutError
+
+
+BUFFER_SIZE = 1024 * 1024          # coalesced write size
+MIN_CHUNK = 64 * 1024              # first / smallest network read
+MAX_CHUNK = 1024 * 1024            # largest network read
+PREALLOCATE_MIN = 4 * 1024 * 1024  # smaller files are not worth a fallocate
+CHECKPOINT_BYTES = 8 * 1024 * 1024  # progress persisted for crash-safe resume
+
+
+class WriteStats:
+    """Thread-safe counters for every file written during a run."""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes_written = 0
+        self.write_calls = 0
+        self.reads = 0
+        self.preallocated_files = 0
+        self.preallocated_bytes = 0
+        self.write_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_read(self):
+        with self._lock:
+            self.reads += 1
+
+    def add_write(self, nbytes: int, seconds: float):
+        with self._lock:
+            self.bytes_written += nbytes
+            self.write_calls += 1
+            self.write_seconds += seconds
+
+    def add_file(self, preallocated: int = 0):
+        with self._lock:
+            self.files += 1
+            if preallocated:
+                self.preallocated_files += 1
+                self.preallocated_bytes += preallocated
+
+    def as_dict(self) -> Dict[str, float]:
+        """Snapshot for instrumentation (benchmarks, logs)."""
+        with self._lock:
+            return {
+                "files": self.files,
+                "bytes_written": self.bytes_written,
+                "write_calls": self.write_calls,
+                "reads": self.reads,
+                "avg_write_bytes": self.bytes_written / self.write_calls if self.write_calls else 0,
+                "preallocated_files": self.preallocated_files,
+                "preallocated_bytes": self.preallocated_bytes,
+                "write_seconds": round(self.write_seconds, 4),
+            }
+
+    def describe(self) -> str:
+        s = self.as_dict()
+        return (f"{s['bytes_written'] / (1024 * 1024):.1f} MB in {s['write_calls']} writes "
+                f"({s['reads']} reads, {s['preallocated_files']} preallocated)")
+
+
+class _BufferPool:
+    """Recycles write buffers so workers don't allocate one per file."""
+
+    def __init__(self, size: int = BUFFER_SIZE, keep: int = 32):
+        self.size = size
+        self.keep = keep
+        self._free: List[bytearray] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bytearray:
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return bytearray(self.size)
+
+    def release(self, buf: bytearray):
+        with self._lock:
+            if len(self._free) < self.keep:
+                self._free.append(buf)
+
+
+_buffers = _BufferPool()
+
+
+class ChunkSizer:
+    """Adaptive network read size.
+
+    Starts small so the first chunk (used for format sniffing) arrives
+    quickly, doubles while reads come back full — data is arriving faster
+    than it is consumed — and halves when they come back mostly empty.
+    Never asks for more than what is left of the file, nor more than
+    ``limit`` (the bandwidth bucket depth when a cap is set), so a capped
+    stream is charged in small steps instead of megabyte lumps.
+    """
+
+    def __init__(self, remaining: Optional[int] = None, limit: Optional[int] = None):
+        self.size = MIN_CHUNK
+        self.remaining = remaining
+        self.limit = max(1, int(limit)) if limit else None
+
+    def next(self) -> int:
+        size = self.size if self.limit is None else min(self.size, self.limit)
+        if self.remaining is not None:
+            return max(1, min(size, self.remaining))
+        return size
+
+    def update(self, requested: int, received: int):
+        if self.remaining is not None:
+            self.remaining -= received
+        if received >= requested:
+            self.size = min(MAX_CHUNK, self.size * 2)
+        elif received < requested // 4:
+            self.size = max(MIN_CHUNK, self.size // 2)
+
+
+def iter_response(resp: requests.Response, total: Optional[int],
+                  stats: Optional[WriteStats] = None,
+                  limit: Optional[int] = None) -> Iterator[bytes]:
+    """Yield a streamed response body in adaptively sized chunks.
+
+    Reads the urllib3 body directly so the size can change between reads.
+    ``read1`` returns whatever has arrived (up to the requested size)
+    rather than blocking until the full amount is in, so short reads
+    reach ``ChunkSizer`` and it can shrink again on a slow link; urllib3
+    1.x has no ``read1`` and falls back to ``read``. urllib3 errors are
+    re-raised as the ``requests`` exceptions ``iter_content`` would
+    produce, so callers' retry handling is unchanged.
+    """
+    sizer = ChunkSizer(total, limit)
+    raw = resp.raw
+    read = getattr(raw, "read1", raw.read)
+    try:
+        while True:
+            want = sizer.next()
+            chunk = read(want, decode_content=True)
+            if not chunk:
+                return
+            sizer.update(want, len(chunk))
+            if stats is not None:
+                stats.add_read()
+            yield chunk
+    except ReadTimeoutError as exc:
+        raise requests.exceptions.ConnectionError(exc)
+    except Urllib3Error as exc:
+        raise requests.exceptions.ChunkedEncodingError(exc)
+
+
+def truncate_file(path: Path, size: int):
+    """Cut a preallocated ``.part`` back to the bytes actually written."""
+    with open(path, "r+b") as fh:
+        fh.truncate(size)
+
+
+def preallocate(fh, offset: int, length: int, end: int) -> bool:
+    """Reserve ``length`` bytes from ``offset`` of an open file (ending at ``end``)."""
+    try:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fh.fileno(), offset, length)
+        elif sys.platform == "win32":
+            # SetEndOfFile reserves the clusters up front on NTFS
+            fh.truncate(end)
+            fh.seek(offset)
+        else:
+            return False
+    except OSError:
+        return False     # unsupported filesystem: plain writes still work
+    return True
+
+
+def create_sized(path: Path, size: int):
+    """Create ``path`` at its final length, for writers filling disjoint ranges."""
+    with open(path, "wb") as fh:
+        if not preallocate(fh, 0, size, size):
+            fh.truncate(size)
+
+
+class MediaWriter:
+    """Coalescing, preallocating writer for one ``.part`` file.
+
+    Used as a context manager. The file is opened lazily on the first
+    write, so callers can persist resume metadata before any space is
+    reserved. Leaving the block flushes the buffer and trims the file to
+    ``position`` — a preallocated tail never survives a failed attempt.
+    While a preallocated file is being filled, ``on_checkpoint`` receives
+    the flushed length every ``CHECKPOINT_BYTES`` so a crash can be resumed
+    from the last known-good offset, and the final length on close so a
+    failed attempt resumes from every byte it wrote.
+
+    With ``resize=False`` the writer only fills bytes from ``offset`` of an
+    existing file (see ``create_sized``) and never truncates or
+    preallocates it, so several writers can share one file.
+    """
+
+    def __init__(self, path: Path, offset: int = 0, total: Optional[int] = None,
+                 stats: Optional[WriteStats] = None,
+                 on_checkpoint: Optional[Callable[[int], None]] = None,
+                 resize: bool = True):
+        self.path = Path(path)
+        self.position = offset
+        self.total = total
+        self.resize = resize
+        self.stats = stats or WriteStats()
+        self.on_checkpoint = on_checkpoint
+        self.preallocated = 0
+        self._fh = None
+        self._buf: Optional[bytearray] = None
+        self._fill = 0
+        self._flushed = offset
+        self._checkpointed = offset
+        self._checkpointing = False
+
+    def __enter__(self) -> "MediaWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # ── Internals ──────────────────────────────────────────────
+
+    def _open(self):
+        if not self.resize:
+            self._fh = open(self.path, "r+b")
+            self._fh.seek(self.position)
+        elif self.position:
+            self._fh = open(self.path, "r+b")
+            self._fh.truncate(self.position)
+            self._fh.seek(self.position)
+        else:
+            self._fh = open(self.path, "wb")
+        self._buf = _buffers.acquire()
+        if self.resize:
+            self._preallocate()
+
+    def _preallocate(self):
+        if self.total is None:
+            return
+        length = self.total - self.position
+        if length < PREALLOCATE_MIN:
+            return
+        if self.on_checkpoint:
+            self._checkpointing = True
+            self.on_checkpoint(self.position)
+        if preallocate(self._fh, self.position, length, self.total):
+            self.preallocated = length
+
+    def _write_out(self, data):
+        started = time.perf_counter()
+        self._fh.write(data)
+        self.stats.add_write(len(data), time.perf_counter() - started)
+        self._flushed += len(data)
+
+    def _drain(self):
+        if self._fill:
+            self._write_out(memoryview(self._buf)[:self._fill])
+            self._fill = 0
+        if (self.preallocated and self.on_checkpoint
+                and self._flushed - self._checkpointed >= CHECKPOINT_BYTES):
+            self._fh.flush()
+            self._checkpointed = self._flushed
+            self.on_checkpoint(self._flushed)
+
+    # ── Public API ─────────────────────────────────────────────
+
+    def write(self, chunk: bytes):
+        if self._fh is None:
+            self._open()
+        n = len(chunk)
+        self.position += n
+        free = len(self._buf) - self._fill
+        if n <= free:
+            self._buf[self._fill:self._fill + n] = chunk
+            self._fill += n
+            if self._fill == len(self._buf):
+                self._drain()
+            return
+        self._drain()
+        if n >= len(self._buf):
+            self._write_out(chunk)       # already large: skip the copy
+        else:
+            self._buf[:n] = chunk
+            self._fill = n
+
+    def close(self):
+        if self._fh is None:
+            return
+        try:
+            self._drain()
+            if self.preallocated:
+                self._fh.truncate(self.position)
+            if self._checkpointing:
+                # the sidecar still holds the last periodic checkpoint
+                self._fh.flush()
+                self.on_checkpoint(self.position)
+        finally:
+            self._fh.close()
+            self._fh = None
+            _buffers.release(self._buf)
+            self._buf = None
+            if self.resize:
+                self.stats.add_file(self.preallocated)
@@ -0,0 +1,174 @@
+"""
+INSTAJECTION — Event-driven Grid Scrolling.
+Paces profile-grid scrolling by what the page reports instead of fixed
+sleeps: a MutationObserver counts post tiles as they are inserted, and
+fetch / XHR hooks count in-flight requests. Each scroll waits in the page
+(one async script call) until new tiles have rendered and settled, or the
+document bottom is reached with nothing left loading.
+
+The same observer accumulates post links as tiles are inserted, so links
+the virtualised grid removes again are never missed and each poll returns
+only the links found since the previous one.
+"""
+
+import random
+import time
+from typing import List, NamedTuple, Optional
+
+
+class ScrollResult(NamedTuple):
+    grew: int               # post tiles inserted since the scroll (-1: unknown)
+    pending: int            # requests still in flight
+    at_bottom: bool
+    at_end: bool            # bottom reached, nothing loading, nothing new
+    waited: float           # seconds spent waiting in the page
+
+
+_WATCH_JS = """
+if (window.__ijGrid) return false;
+const now = () => performance.now();
+const g = window.__ijGrid = {
+    added: 0, lastMutation: now(), lastNet: now(), inflight: new Map(),
+    seen: new Set(), links: [],
+};
+const POST = 'a[href*="/p/"], a[href*="/reel/"]';
+const record = a => {
+    const href = a.href;
+    if (href && !g.seen.has(href)) { g.seen.add(href); g.links.push(href); }
+};
+document.querySelectorAll(POST).forEach(record);
+
+new MutationObserver(records => {
+    let n = 0;
+    for (const r of records) {
+        if (r.type === 'attributes') {
+            if (r.target.matches(POST)) { record(r.target); n++; }
+            continue;
+        }
+        for (const node of r.addedNodes) {
+            if (node.nodeType !== 1) continue;
+            if (node.matches(POST)) { record(node); n++; continue; }
+            const found = node.querySelectorAll(POST);
+            found.forEach(record);
+            n += found.length;
+        }
+    }
+    if (n) { g.added += n; g.lastMutation = now(); }
+}).observe(document.body, {childList: true, subtree: true, attributes: true, attributeFilter: ['href']});
+
+let seq = 0;
+const begin = () => { const id = ++seq; g.inflight.set(id, now()); g.lastNet = now(); return id; };
+const end = id => { g.inflight.delete(id); g.lastNet = now(); };
+
+const origFetch = window.fetch;
+window.fetch = function(...args) {
+    const id = begin();
+    return origFetch.apply(this, args).finally(() => end(id));
+};
+const origSend = XMLHttpRequest.prototype.send;
+XMLHttpRequest.prototype.send = function(...args) {
+    const id = begin();
+    this.addEventListener('loadend', () => end(id), {once: true});
+    return origSend.apply(this, args);
+};
+return true;
+"""
+
+_TAKE_JS = """
+const g = window.__ijGrid;
+if (!g) return null;
+const out = g.links;
+g.links = [];
+return out;
+"""
+
+# arguments: minMs, maxMs, settleMs, staleMs, callback
+_SCROLL_JS = """
+const [minMs, maxMs, settleMs, staleMs] = arguments;
+const done = arguments[arguments.length - 1];
+const g = window.__ijGrid;
+if (!g) { done(null); return; }
+const start = performance.now(), base = g.added;
+const pending = t => { let n = 0; for (const s of g.inflight.values()) if (t - s < staleMs) n++; return n; };
+window.scrollBy(0, window.innerHeight * 0.85);
+
+const tick = () => {
+    const t = performance.now(), elapsed = t - start;
+    const el = document.scrollingElement || document.documentElement;
+    const atBottom = el.scrollTop + window.innerHeight >= el.scrollHeight - 4;
+    const grew = g.added - base, busy = pending(t);
+    // idle: nothing loading and no tiles / requests for settleMs since the scroll
+    const idle = busy === 0 && t - Math.max(g.lastMutation, g.lastNet, start) >= settleMs;
+    const rendered = grew > 0 && busy === 0 && t - g.lastMutation >= settleMs;
+    const atEnd = atBottom && grew === 0 && idle;
+    if ((elapsed >= minMs && (rendered || idle)) || elapsed >= maxMs) {
+        done({grew: grew, pending: busy, at_bottom: atBottom, at_end: atEnd, waited: elapsed / 1000});
+        return;
+    }
+    setTimeout(tick, 50);
+};
+tick();
+"""
+
+
+class GridWatcher:
+    """Scrolls the profile grid as fast as the page renders new tiles."""
+
+    SETTLE = 0.35           # s without new tiles / requests that counts as "rendered"
+    STALE_REQUEST = 10.0    # s after which an open request (long poll) is ignored
+
+    def __init__(self, driver, pause_min: float = 0.3, wait_max: float = 8.0):
+        self.driver = driver
+        self.pause_min = max(0.0, pause_min)
+        self.wait_max = max(self.pause_min + 0.5, wait_max)
+        self.installed = False
+
+    def install(self) -> bool:
+        """Hook the current document; call again after a full navigation."""
+        try:
+            self.driver.set_script_timeout(self.wait_max + 10)
+            self.driver.execute_script(_WATCH_JS)
+            self.installed = True
+        except Exception:
+            self.installed = False
+        return self.installed
+
+    def new_links(self) -> Optional[List[str]]:
+        """Post links inserted since the last call, in insertion order.
+
+        None when the hook is not installed (or was lost to a navigation).
+        """
+        if not self.installed:
+            return None
+        try:
+            links = self.driver.execute_script(_TAKE_JS)
+        except Exception:
+            links = None
+        if links is None:
+            self.installed = False
+            return None
+        return list(links)
+
+    def scroll(self) -> ScrollResult:
+        """Scroll one screen and wait until the page has reacted."""
+        # randomised lower bound keeps the cadence from looking mechanical
+        pause = random.uniform(self.pause_min, self.pause_min * 2)
+        if self.installed:
+            try:
+                raw = self.driver.execute_async_script(
+                    _SCROLL_JS, int(pause * 1000), int(self.wait_max * 1000),
+                    int(self.SETTLE * 1000), int(self.STALE_REQUEST * 1000),
+                )
+                if raw:
+                    return ScrollResult(
+                        int(raw.get("grew") or 0), int(raw.get("pending") or 0),
+                        bool(raw.get("at_bottom")), bool(raw.get("at_end")),
+                        float(raw.get("waited") or 0.0),
+                    )
+                self.installed = False      # page navigated, hook is gone
+            except Exception:
+                self.installed = False
+        # fallback: plain scroll and a fixed pause
+        self.driver.execute_script("window.scrollBy(0, window.innerHeight * 0.85);")
+        time.sleep(max(pause, 1.0))
+        return ScrollResult(-1, 0, False, False, max(pause, 1.0))
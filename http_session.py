@@ -0,0 +1,103 @@
+"""
+INSTAJECTION — Shared HTTP Session.
+One pooled, keep-alive requests session used by every media download and
+HEAD probe, so repeat requests to the same CDN host reuse warm TCP/TLS
+connections instead of handshaking per file.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import RateLimiter
+
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) "
+    "Gecko/20100101 Firefox/128.0"
+)
+
+DEFAULT_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Referer": "https://www.instagram.com/",
+    "Accept": "*/*",
+    "Connection": "keep-alive",
+}
+
+
+class HttpClient:
+    """Process-wide requests session with per-host connection pools.
+
+    ``pool_connections`` is the number of distinct hosts kept warm and
+    ``pool_maxsize`` the number of sockets kept per host. urllib3 pools
+    are thread-safe, so one client is shared by all download workers.
+    """
+
+    POOL_CONNECTIONS = 10
+    POOL_MAXSIZE = 16
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pool_connections: int = POOL_CONNECTIONS,
+                 pool_maxsize: int = POOL_MAXSIZE):
+        self.pool_connections = max(1, int(pool_connections))
+        self.pool_maxsize = max(1, int(pool_maxsize))
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=0,          # retries are handled by the callers
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # ── Shared instance ────────────────────────────────────────
+
+    @classmethod
+    def shared(cls) -> "HttpClient":
+        """Return the process-wide client, creating it on first use."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def configure(cls, pool_connections: int = None, pool_maxsize: int = None):
+        """Resize the shared pools; rebuilds the client only if they change."""
+        pool_connections = pool_connections or cls.POOL_CONNECTIONS
+        pool_maxsize = pool_maxsize or cls.POOL_MAXSIZE
+        with cls._shared_lock:
+            cur = cls._shared
+            if (cur is not None
+                    and cur.pool_connections == pool_connections
+                    and cur.pool_maxsize == pool_maxsize):
+                return
+            cls._shared = cls(pool_connections, pool_maxsize)
+            if cur is not None:
+                cur.close()
+
+    # ── Requests ───────────────────────────────────────────────
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the shared per-host rate limiter."""
+        limiter = RateLimiter.shared()
+        limiter.acquire(url)
+        resp = self.session.request(method, url, **kwargs)
+        limiter.feedback(url, resp.status_code, resp.headers.get("Retry-After"))
+        return resp
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request("HEAD", url, **kwargs)
+
+    def close(self):
+        try:
+            self.session.close()
+        except Exception:
+            pass
@@ -4,14 +4,12 @@ Handles browser setup, login, profile scrolling, post collection,
 carousel image extraction, reel video capture, and anti-ban measures.
 """
 
-import re
+import copy
 import time
 import random
-from typing import List, Dict, Optional, Tuple, Set
+from typing import Any, List, Dict, Optional, Tuple, Set
 from urllib.parse import urlparse
 
-import requests as http_requests  # renamed to avoid selenium conflict
-
 from selenium import webdriver
 from selenium.webdriver.firefox.service import Service as FxService
 from selenium.webdriver.firefox.options import Options as FxOptions
@@ -21,7 +19,6 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException,
     NoSuchElementException,
-    StaleElementReferenceException,
     WebDriverException,
 )
 
@@ -30,7 +27,19 @@ try:
 except ImportError:
     GeckoDriverManager = None
 
+from config import ConfigManager
+from async_downloader import AsyncDownloadManager
+from browser_pool import BrowserPool, add_cookies
+from browser_profile import ProfileSlots, apply_lean, prepare_profile
+from cdn_url import asset_key, largest_variant
 from downloader import DownloadManager
+from grid_watch import GridWatcher
+from http_session import HttpClient, USER_AGENT
+from network_capture import NetworkCapture, read_inline_json, read_inline_posts
+from page_bundle import PageBundle, read_bundle
+from post_data import PostMedia
+from rate_limiter import BandwidthLimiter, RateLimiter
+from video_probe import best_video, candidates_from_json, candidates_from_source
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -47,18 +56,27 @@ class InstagramBot:
     ACT_MIN, ACT_MAX = 2.0, 5.0          # general action pause
     SCROLL_MIN, SCROLL_MAX = 3.0, 7.0    # between scrolls
     TYPE_MIN, TYPE_MAX = 0.05, 0.15      # per-character typing
-    MAX_SCROLL_STALLS = 8                 # scroll-end detection
+    KNOWN_STREAK = 12                     # incremental: archived posts in a row
 
     # ── Constructor ────────────────────────────────────────────
 
-    def __init__(self, log_callback=None, stop_flag=None):
+    def __init__(self, log_callback=None, stop_flag=None, config=None):
         self.driver = None
         self.log = log_callback or print
         self.stop_flag = stop_flag        # threading.Event
+        self.config: ConfigManager = config or ConfigManager()
         self.action_count = 0
         self.post_count = 0
         self.image_posts: List[Dict] = []
         self.reel_posts: List[Dict] = []
+        self.reached_grid_end = False
+        self.target_user: Optional[str] = None
+        self.capture: Optional[NetworkCapture] = None
+        self.pool: Optional[BrowserPool] = None
+        self.session_restored = False
+        self._gecko_path: Optional[str] = None
+        self._profile_slots = ProfileSlots()         # one lean profile per live browser
+        self._driver_slots: Dict[Any, int] = {}
         self.download_manager: Optional[DownloadManager] = None
 
     # ── Flow control helpers ───────────────────────────────────
@@ -97,63 +115,20 @@ class InstagramBot:
     #  BROWSER SETUP
     # ═══════════════════════════════════════════════════════════
 
-    def setup_browser(self) -> bool:
-        """Launch Firefox with stealth/anti-detect options."""
+    def setup_browser(self, session_user: Optional[str] = None) -> bool:
+        """Launch Firefox with stealth/anti-detect options.
+
+        With ``session_user``, the session saved by that account's last
+        login is restored into the new browser (see ``session_restored``).
+        """
         try:
             self.log("🔧 Configuring Firefox WebDriver…")
-            opts = FxOptions()
-
-            # ── 720p window ────────────────────────────────────
-            opts.add_argument("--width=1280")
-            opts.add_argument("--height=720")
-
-            # ── Disable notifications ──────────────────────────
-            opts.set_preference("dom.webnotifications.enabled", False)
-            opts.set_preference("dom.push.enabled", False)
-
-            # ── Disable password manager / autofill ────────────
-            opts.set_preference("signon.rememberSignons", False)
-            opts.set_preference("signon.autofillForms", False)
-            opts.set_preference("signon.formlessCapture.enabled", False)
-
-            # ── Disable translation ────────────────────────────
-            opts.set_preference("browser.translations.automaticallyPopup", False)
-            opts.set_preference("browser.translations.enable", False)
-
-            # ── Anti-detection ─────────────────────────────────
-            opts.set_preference("dom.webdriver.enabled", False)
-            opts.set_preference("useAutomationExtension", False)
-            opts.set_preference(
-                "general.useragent.override",
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) "
-                "Gecko/20100101 Firefox/128.0",
-            )
-
-            # ── Disable geolocation / media popups ─────────────
-            opts.set_preference("geo.enabled", False)
-            opts.set_preference("media.autoplay.default", 5)
-
-            # ── Enable performance logging for network capture ─
-            opts.set_preference("devtools.netmonitor.enabled", True)
-
-            # ── Resolve geckodriver ────────────────────────────
-            try:
-                if GeckoDriverManager is not None:
-                    self.log("📥 Checking / downloading geckodriver…")
-                    svc = FxService(GeckoDriverManager().install())
-                else:
-                    svc = FxService()
-            except Exception as exc:
-                self.log(f"⚠️  webdriver-manager issue: {exc}")
-                self.log("🔄 Falling back to system geckodriver…")
-                svc = FxService()
-
-            self.driver = webdriver.Firefox(service=svc, options=opts)
-            self.driver.set_window_size(1280, 720)
-            self.driver.set_page_load_timeout(45)
-            self.driver.implicitly_wait(0)
-
-            self.log("Firefox WebDriver ready (1280x720)")
+            self.driver = self._launch_firefox()
+            lean = self.config.get_browser_mode() == "lean"
+            self.log("Firefox WebDriver ready (1280x720"
+                     + (", lean headless profile)" if lean else ")"))
+            if session_user and self.config.get_reuse_session():
+                self.session_restored = self._restore_session(session_user)
             return True
 
         except WebDriverException as exc:
@@ -164,6 +139,129 @@ class InstagramBot:
             self.log(f"❌ Browser setup failed: {str(exc)[:250]}")
             return False
 
+    def _launch_firefox(self):
+        """A new Firefox instance; also used for the browser pool's workers."""
+        opts = FxOptions()
+
+        # ── 720p window ────────────────────────────────────
+        opts.add_argument("--width=1280")
+        opts.add_argument("--height=720")
+
+        # ── Disable notifications ──────────────────────────
+        opts.set_preference("dom.webnotifications.enabled", False)
+        opts.set_preference("dom.push.enabled", False)
+
+        # ── Disable password manager / autofill ────────────
+        opts.set_preference("signon.rememberSignons", False)
+        opts.set_preference("signon.autofillForms", False)
+        opts.set_preference("signon.formlessCapture.enabled", False)
+
+        # ── Disable translation ────────────────────────────
+        opts.set_preference("browser.translations.automaticallyPopup", False)
+        opts.set_preference("browser.translations.enable", False)
+
+        # ── Anti-detection ─────────────────────────────────
+        opts.set_preference("dom.webdriver.enabled", False)
+        opts.set_preference("useAutomationExtension", False)
+        opts.set_preference("general.useragent.override", USER_AGENT)
+
+        # ── Disable geolocation / media popups ─────────────
+        opts.set_preference("geo.enabled", False)
+        opts.set_preference("media.autoplay.default", 5)
+
+        # ── Enable performance logging for network capture ─
+        opts.set_preference("devtools.netmonitor.enabled", True)
+
+        # ── Lean mode: headless, no media bytes, small caches ─
+        slot = None
+        if self.config.get_browser_mode() == "lean":
+            slot = self._profile_slots.acquire()
+            apply_lean(opts, prepare_profile(self.config.config_dir / "profiles", slot))
+
+        try:
+            driver = webdriver.Firefox(service=self._gecko_service(), options=opts)
+        except Exception:
+            if slot is not None:
+                self._profile_slots.release(slot)
+            raise
+        if slot is not None:
+            self._driver_slots[driver] = slot
+        driver.set_window_size(1280, 720)
+        driver.set_page_load_timeout(45)
+        driver.implicitly_wait(0)
+        return driver
+
+    def _quit_browser(self, driver):
+        """Quit a browser from ``_launch_firefox`` and free its profile slot."""
+        try:
+            driver.quit()
+        finally:
+            slot = self._driver_slots.pop(driver, None)
+            if slot is not None:
+                self._profile_slots.release(slot)
+
+    def _gecko_service(self) -> FxService:
+        """Resolve geckodriver once; pool workers reuse the path."""
+        if self._gecko_path:
+            return FxService(self._gecko_path)
+        try:
+            if GeckoDriverManager is not None:
+                self.log("📥 Checking / downloading geckodriver…")
+                self._gecko_path = GeckoDriverManager().install()
+                return FxService(self._gecko_path)
+            return FxService()
+        except Exception as exc:
+            self.log(f"⚠️  webdriver-manager issue: {exc}")
+            self.log("🔄 Falling back to system geckodriver…")
+            return FxService()
+
+    # ── Saved session ──────────────────────────────────────────
+
+    def _restore_session(self, username: str) -> bool:
+        """Load saved cookies and local storage; validity is checked later."""
+        session = self.config.load_session(username)
+        if not session:
+            return False
+        now = time.time()
+        cookies = [
+            c for c in session.get("cookies") or []
+            if not c.get("expiry") or c["expiry"] > now
+        ]
+        if not any(c.get("name") == "sessionid" for c in cookies):
+            self.config.clear_session(username)
+            return False
+        try:
+            self.log("🔑 Restoring saved session…")
+            self.driver.get(self.BASE_URL + "/robots.txt")
+            add_cookies(self.driver, cookies)
+            self.driver.execute_script(
+                "const items = arguments[0];"
+                "for (const k in items) { try { localStorage.setItem(k, items[k]); } catch (e) {} }",
+                session.get("local_storage") or {},
+            )
+            self.driver.get(self.BASE_URL + "/")
+            return True
+        except WebDriverException as exc:
+            self.log(f"⚠️  Session restore failed: {str(exc)[:120]}")
+            return False
+
+    def _save_session(self, username: str):
+        """Persist the logged-in cookies and local storage (encrypted)."""
+        if not self.config.get_reuse_session():
+            return
+        try:
+            session = {
+                "cookies": self.driver.get_cookies(),
+                "local_storage": self.driver.execute_script(
+                    "return Object.assign({}, window.localStorage);"
+                ) or {},
+                "saved_at": time.time(),
+            }
+        except WebDriverException:
+            return
+        self.config.save_session(username, session)
+        self.log("🔑 Session saved for the next run")
+
     # ═══════════════════════════════════════════════════════════
     #  LOGIN
     # ═══════════════════════════════════════════════════════════
@@ -319,7 +417,10 @@ class InstagramBot:
             except TimeoutException:
                 continue
 
-    def _verify_login(self) -> bool:
+    def _verify_login(self, quick: bool = False) -> bool:
+        """Logged in? ``quick`` inspects the loaded page without waiting."""
+        if quick:
+            return self._session_active()
         try:
             WebDriverWait(self.driver, 12).until(
                 lambda d: "/accounts/login" not in d.current_url
@@ -337,6 +438,31 @@ class InstagramBot:
         except TimeoutException:
             return False
 
+    def _session_active(self, timeout: float = 6.0) -> bool:
+        """Wait (bounded) until the page shows either the logged-in Home
+        icon or the login form ``login()`` fills in; True only for the former.
+
+        The ``sessionid`` cookie alone proves nothing — a restored cookie the
+        server has expired is still sent, and the page answers with the form.
+        """
+        state_js = (
+            "if (document.querySelector('input[name=\"email\"], input[name=\"pass\"]')) return 'out';"
+            "if (document.querySelector('svg[aria-label=\"Home\"]')) return 'in';"
+            "return null;"
+        )
+
+        def state(d):
+            if "/accounts/login" in d.current_url:
+                return "out"
+            return d.execute_script(state_js)
+
+        try:
+            if not self.driver.get_cookie("sessionid"):
+                return False
+            return WebDriverWait(self.driver, timeout, poll_frequency=0.25).until(state) == "in"
+        except (TimeoutException, WebDriverException):
+            return False
+
     # ═══════════════════════════════════════════════════════════
     #  PROFILE NAVIGATION
     # ═══════════════════════════════════════════════════════════
@@ -361,6 +487,7 @@ class InstagramBot:
                 self.log("🔒 Private account — only visible if you follow them.")
 
             self.log(f"✅ Profile loaded: @{username}")
+            self.target_user = username
             return True, username
 
         except TimeoutException:
@@ -372,53 +499,80 @@ class InstagramBot:
     #  SCROLL & COLLECT POSTS
     # ═══════════════════════════════════════════════════════════
 
-    def collect_all_posts(self) -> int:
-        """Scroll through the profile grid and collect every post link."""
-        self.log("Scrolling profile to collect all posts...")
+    def collect_all_posts(self, known: Optional[Set[str]] = None) -> int:
+        """Scroll through the profile grid and collect every post link.
+
+        With ``known`` (IDs archived by earlier runs) scrolling stops as
+        soon as ``KNOWN_STREAK`` archived posts are seen in a row, since
+        everything below them was already synced.
+        """
+        if known:
+            self.log("Scrolling profile for new posts (incremental)...")
+        else:
+            self.log("Scrolling profile to collect all posts...")
         posts: Set[str] = set()
-        last_new_time = time.time()
-        scroll_n = 0
+        stalls = at_end = 0
+        known_streak = 0
+        end_checks = self.config.get_grid_end_checks()
+        stall_limit = self.config.get_grid_stall_limit()
+        self.reached_grid_end = False
+        if self.config.get_network_capture():
+            self.capture = NetworkCapture(self.driver, self.target_user, self.log)
+            if not self.capture.install():
+                self.capture = None
+        watcher = GridWatcher(
+            self.driver,
+            self.config.get_scroll_pause_min(),
+            self.config.get_scroll_wait_max(),
+        )
+        watcher.install()
 
         while True:
             if self.should_stop():
                 self.log("Stop requested during collection")
                 break
+            if self.capture:
+                self.capture.drain()
 
-            # grab visible links
-            found = self._visible_post_links()
-            before = len(posts)
-            posts.update(found)
-            delta = len(posts) - before
+            # links inserted since the last poll (grid order, newest first)
+            links = watcher.new_links()
+            if links is None:
+                links = self._visible_post_links()
+            new = [h for h in links if h not in posts]
+            posts.update(new)
+            delta = len(new)
 
             if delta > 0:
-                last_new_time = time.time()
+                stalls = at_end = 0
                 self.log(f"+{delta} posts (total {len(posts)})")
-
-            # 15s timeout check if no new posts have been found
-            if time.time() - last_new_time >= 15.0:
-                self.log("No new content found in 15 seconds. Proceeding to download...")
+            else:
+                stalls += 1
+
+            if known:
+                for href in new:
+                    known_streak = known_streak + 1 if self._post_id(href) in known else 0
+                if known_streak >= self.KNOWN_STREAK:
+                    self.log(f"Reached {known_streak} archived posts in a row. Proceeding to download...")
+                    break
+
+            if at_end >= end_checks:
+                self.log("Reached the end of the grid. Proceeding to download...")
+                self.reached_grid_end = True
+                break
+            if stalls >= stall_limit:
+                # not proof of the end (slow page, throttling): no full sync
+                self.log(f"No new posts after {stalls} scrolls. Proceeding to download...")
                 break
 
-            # scroll
-            scroll_n += 1
-            self.driver.execute_script("window.scrollBy(0, window.innerHeight * 0.85);")
-            self._sleep(0.6, 1.2)
-
-            # micro-jitter every 6 scrolls
-            if scroll_n % 6 == 0:
-                self.driver.execute_script(f"window.scrollBy(0,{random.randint(-80, -30)});")
-                self._sleep(0.3, 0.6)
-                self.driver.execute_script(f"window.scrollBy(0,{random.randint(40, 90)} );")
-                self._sleep(0.3, 0.5)
+            # scroll, then wait for the page to render the next tiles
+            result = watcher.scroll()
+            at_end = at_end + 1 if result.at_end else 0
 
         # categorise
         for href in posts:
-            pid = self._post_id(href)
-            info = {"url": href, "id": pid}
-            if "/reel/" in href or "/reels/" in href:
-                self.reel_posts.append(info)
-            else:
-                self.image_posts.append(info)
+            self._add_post(href)
+        if self.capture:
+            self._add_captured_posts(posts)
 
         self.log(
             f"Collection done -> "
@@ -427,22 +581,102 @@ class InstagramBot:
         )
         return len(posts)
 
-    def _visible_post_links(self) -> Set[str]:
-        links: Set[str] = set()
-        try:
-            elems = self.driver.find_elements(
-                By.CSS_SELECTOR, 'a[href*="/p/"], a[href*="/reel/"]'
-            )
-            for a in elems:
-                try:
-                    href = a.get_attribute("href")
-                    if href and ("/p/" in href or "/reel/" in href):
-                        links.add(href)
-                except StaleElementReferenceException:
-                    continue
-        except Exception as exc:
-            self.log(f"⚠️  Link scan error: {str(exc)[:100]}")
-        return links
+    def _add_post(self, href: str, pid: Optional[str] = None):
+        info = {"url": href, "id": pid or self._post_id(href)}
+        if "/reel/" in href or "/reels/" in href:
+            self.reel_posts.append(info)
+        else:
+            self.image_posts.append(info)
+
+    def _add_captured_posts(self, posts: Set[str]):
+        """Posts seen only in API responses (e.g. loaded past the last scan).
+
+        Only posts whose owner is known to be the target are added; the
+        capture also keeps owner-less media (suggestions, embeds) for
+        lookups by ID, but those never came from this profile's grid.
+        """
+        self.capture.drain()
+        seen = {self._post_id(h) for h in posts}
+        target = (self.target_user or "").lower()
+        extra = [
+            p for pid, p in self.capture.posts.items()
+            if pid not in seen and p.owner and p.owner.lower() == target
+        ]
+        for media in extra:
+            self._add_post(media.url, media.post_id)
+        self.log(
+            f"Network capture: media for {len(self.capture.posts)} posts "
+            f"from {self.capture.responses} responses"
+            + (f" (+{len(extra)} not in the grid scan)" if extra else "")
+        )
+
+    def _captured(self, post_id: str) -> Optional[PostMedia]:
+        return self.capture.get(post_id) if self.capture else None
+
+    def _enqueue_captured(self, media: PostMedia, dm: DownloadManager) -> int:
+        """Queue a post's files straight from captured data — no page visit."""
+        pid = media.post_id
+        for n, item in enumerate(media.images):
+            dm.enqueue_image(item.url, pid, n)
+        for n, item in enumerate(media.videos):
+            if media.is_reel and n == 0:
+                dm.enqueue_reel(item.url, pid)
+            else:
+                dm.enqueue_reel(item.url, f"{pid}_vid" + (str(n + 1) if n else ""), group=pid)
+        return len(media.items)
+
+    def _add_partial_posts(self, dm: DownloadManager):
+        """Incremental runs stop early, so retry older unfinished posts too."""
+        have = {p["id"] for p in self.image_posts + self.reel_posts}
+        retry = [(pid, url) for pid, url in dm.manifest.partial_posts() if pid not in have]
+        for pid, url in retry:
+            self._add_post(url, pid)
+        if retry:
+            self.log(f"Retrying {len(retry)} unfinished post(s) from earlier runs")
+
+    def _visible_post_links(self) -> List[str]:
+        """Post links currently in the DOM, in document (grid) order."""
+        return [
+            h for h in read_bundle(self.driver, media=False).links
+            if "/p/" in h or "/reel/" in h
+        ]
+
+    # ── Parallel browsers ──────────────────────────────────────
+
+    def _on_driver(self, driver) -> "InstagramBot":
+        """This bot, driving another browser (shares log, capture and lists)."""
+        view = copy.copy(self)
+        view.driver = driver
+        return view
+
+    def _run_page_jobs(self, jobs: List, handler):
+        """Run ``handler(bot, job)`` for posts that need a page visit.
+
+        With more than one browser worker configured, the jobs are spread
+        over a pool of logged-in browsers; otherwise they run here in order.
+        The pool opens no more browsers than the batch has posts and grows
+        when a later, larger batch can use more of them.
+        """
+        if not jobs:
+            return
+        size = min(self.config.get_browser_workers(), len(jobs))
+        if self.pool is None and size > 1:
+            self.log(f"🧭 Starting {size - 1} extra browser(s) for {len(jobs)} posts…")
+            self.pool = BrowserPool(size, self._launch_firefox, self.BASE_URL,
+                                    self.log, self.stop_flag, self._quit_browser)
+            self.pool.start(self.driver)
+        elif self.pool is not None and size > self.pool.size:
+            self.log(f"🧭 Starting {size - self.pool.size} more browser(s) for {len(jobs)} posts…")
+            self.pool.grow(size)
+        if self.pool is None or len(self.pool.workers) < 2:
+            for job in jobs:
+                if self.should_stop():
+                    break
+                handler(self, job)
+            return
+        left = self.pool.run(jobs, lambda driver, job: handler(self._on_driver(driver), job))
+        if left and not self.should_stop():
+            self.log(f"⚠️  {left} post(s) left unprocessed — no healthy browser")
 
     # ═══════════════════════════════════════════════════════════
     #  IMAGE POST PROCESSING
@@ -451,29 +685,78 @@ class InstagramBot:
     def process_image_posts(self, dm: DownloadManager):
         total = len(self.image_posts)
         self.log(f"Processing {total} image posts...")
+        skipped = 0
+        visits = []
 
         for i, post in enumerate(self.image_posts):
             if self.should_stop():
                 break
+            if dm.is_post_complete(post["id"]):
+                skipped += 1
+                continue
             self.post_count += 1
             self._rate_check()
 
-            self.log(f"[{i + 1}/{total}] Opening post {post['id']}...")
-            try:
-                self.driver.get(post["url"])
-                self._sleep(0.4, 0.8)
+            media = self._captured(post["id"])
+            if media:
+                dm.begin_post(post["id"], post["url"])
+                n = self._enqueue_captured(media, dm)
+                dm.end_post(post["id"], n)
+                self.log(f"[{i + 1}/{total}] Queued {n} file(s) from post {post['id']} (captured)")
+                continue
+            visits.append((i, post))
+
+        if skipped:
+            self.log(f"Skipping {skipped} already archived image post(s)")
+        self._run_page_jobs(
+            visits, lambda bot, job: bot._visit_image_post(job[0], total, job[1], dm),
+        )
 
+    def _visit_image_post(self, i: int, total: int, post: Dict, dm: DownloadManager) -> bool:
+        """Open one post and queue its files; False if nothing was queued."""
+        self.log(f"[{i + 1}/{total}] Opening post {post['id']}...")
+        dm.begin_post(post["id"], post["url"])
+        n, ok = 0, False
+        try:
+            self.driver.get(post["url"])
+            self._sleep(0.4, 0.8)
+
+            media = self._embedded_post(post["id"])
+            if media:
+                # every slide from the page data — no click-through
+                n = self._enqueue_captured(media, dm)
+            else:
                 n = self._collect_images(post["id"], dm)
-                self._check_post_video(post["id"], dm)
-                self.log(f"    Saved {n} image(s) from post {post['id']}")
+                n += self._check_post_video(post["id"], dm)
+            ok = not self.should_stop()
+            self.log(f"    Queued {n} file(s) from post {post['id']}")
 
-            except Exception as exc:
-                self.log(f"    Error: {str(exc)[:150]}")
+        except Exception as exc:
+            self.log(f"    Error: {str(exc)[:150]}")
+        finally:
+            dm.end_post(post["id"], n, ok)
 
-            self._sleep(0.3, 0.6)
+        self._sleep(0.3, 0.6)
+        return n > 0
+
+    def _embedded_post(self, pid: str) -> Optional[PostMedia]:
+        """All slides of the open post, read from its embedded JSON in one pass."""
+        try:
+            for media in read_inline_posts(self.driver):
+                if media.post_id == pid:
+                    if len(media.items) > 1:
+                        self.log(f"    Carousel resolved from page data ({len(media.items)} slides)")
+                    return media
+        except Exception:
+            pass
+        return None
 
     def _collect_images(self, pid: str, dm: DownloadManager) -> int:
-        """Walk through a (possibly carousel) post and download images instantly."""
+        """Walk through a (possibly carousel) post and download images instantly.
+
+        Fallback for posts whose page data could not be read: clicks through
+        the slides so lazily rendered images appear in the DOM.
+        """
         collected = 0
         seen: Set[str] = set()
 
@@ -491,11 +774,12 @@ class InstagramBot:
             if self.should_stop():
                 break
 
-            images = self._main_post_images()
+            images = self._main_post_images(read_bundle(self.driver, links=False))
             for src in images:
-                if src not in seen and self._valid_img(src):
-                    seen.add(src)
-                    dm.download_image(src, pid, collected)
+                key = asset_key(src)
+                if key not in seen and self._valid_img(src):
+                    seen.add(key)
+                    dm.enqueue_image(src, pid, collected)
                     collected += 1
 
             if not self._carousel_next():
@@ -505,39 +789,13 @@ class InstagramBot:
 
         return collected
 
-    def _main_post_images(self) -> List[str]:
-        """Return high-res image URLs from the main post in 1ms via JS (excluding suggestions)."""
-        try:
-            return self.driver.execute_script("""
-                const imgs = [];
-                const container = document.querySelector('article') || document.querySelector('main') || document.body;
-                
-                container.querySelectorAll('img').forEach(img => {
-                    let isSuggested = false;
-                    let p = img.parentElement;
-                    for (let i = 0; i < 12; i++) {
-                        if (!p) break;
-                        const txt = (p.innerText || '').toLowerCase();
-                        if (txt.includes('more posts') || txt.includes('suggested for you') || txt.includes('related accounts')) {
-                            isSuggested = true;
-                            break;
-                        }
-                        p = p.parentElement;
-                    }
-                    
-                    if (!isSuggested) {
-                        const src = img.getAttribute('src') || '';
-                        if (src && (src.includes('instagram') || src.includes('fbcdn') || src.includes('cdninstagram'))) {
-                            if (!src.includes('150x150') && !src.includes('s150x150') && !src.includes('s64x64') && !src.includes('44x44')) {
-                                imgs.push(src);
-                            }
-                        }
-                    }
-                });
-                return imgs;
-            """) or []
-        except Exception:
-            return []
+    def _main_post_images(self, bundle: PageBundle) -> List[str]:
+        """Largest srcset rendition of each main-post image (suggestions excluded)."""
+        return [
+            largest_variant(img.src, img.srcset) for img in bundle.images
+            if any(d in img.src for d in ("instagram", "fbcdn", "cdninstagram"))
+            and not any(t in img.src for t in ("150x150", "s150x150", "s64x64", "44x44"))
+        ]
 
     @staticmethod
     def _valid_img(src: str) -> bool:
@@ -564,29 +822,24 @@ class InstagramBot:
         except Exception:
             return False
 
-    def _check_post_video(self, pid: str, dm: DownloadManager):
+    def _check_post_video(self, pid: str, dm: DownloadManager) -> int:
         """If an image-post also contains embedded video, grab it."""
-        try:
-            for vid in self.driver.find_elements(
-                By.CSS_SELECTOR,
-                "article video, div[role='presentation'] video",
-            ):
-                try:
-                    src = vid.get_attribute("src")
-                    if src and src.startswith("http"):
-                        dm.download_reel(src, f"{pid}_vid")
-                    elif src and src.startswith("blob:"):
-                        self.log(
-                            f"    📹 Blob video in {pid} — "
-                            f"trying page-data extraction…"
-                        )
-                        real = self._video_from_page(pid)
-                        if real:
-                            dm.download_reel(real, f"{pid}_vid")
-                except StaleElementReferenceException:
-                    continue
-        except Exception:
-            pass
+        queued = 0
+        bundle = read_bundle(self.driver, links=False)
+        for src in bundle.videos:
+            if src.startswith("http"):
+                dm.enqueue_reel(src, f"{pid}_vid", group=pid)
+                queued += 1
+            elif src.startswith("blob:"):
+                self.log(
+                    f"    📹 Blob video in {pid} — "
+                    f"trying page-data extraction…"
+                )
+                real = self._video_from_page(pid, bundle)
+                if real:
+                    dm.enqueue_reel(real, f"{pid}_vid", group=pid)
+                    queued += 1
+        return queued
 
     # ═══════════════════════════════════════════════════════════
     #  REEL POST PROCESSING
@@ -596,61 +849,85 @@ class InstagramBot:
         total = len(self.reel_posts)
         self.log(f"\n🎬 Processing {total} reel posts…")
 
+        skipped = 0
+        visits = []
+
         for i, reel in enumerate(self.reel_posts):
             if self.should_stop():
                 break
+            if dm.is_post_complete(reel["id"]):
+                skipped += 1
+                continue
             self.post_count += 1
             self._rate_check()
 
-            self.log(f"\n🎥 [{i + 1}/{total}] Opening reel {reel['id']}…")
-            try:
-                self.driver.get(reel["url"])
-                self._sleep(3, 5)
+            media = self._captured(reel["id"])
+            if media and media.videos:
+                dm.begin_post(reel["id"], reel["url"])
+                n = self._enqueue_captured(media, dm)
+                dm.end_post(reel["id"], n)
+                self.log(f"🎥 [{i + 1}/{total}] Queued reel {reel['id']} (captured)")
+                continue
+            visits.append((i, reel))
 
-                url = self._best_reel_url(reel["id"])
-                if url:
-                    dm.download_reel(url, reel["id"])
-                else:
-                    self.log(f"    ⚠️  Could not extract video for {reel['id']}")
-            except Exception as exc:
-                self.log(f"    ❌ Error: {str(exc)[:150]}")
+        if skipped:
+            self.log(f"Skipping {skipped} already archived reel(s)")
+        self._run_page_jobs(
+            visits, lambda bot, job: bot._visit_reel(job[0], total, job[1], dm),
+        )
 
-            self._sleep(2, 4)
+    def _visit_reel(self, i: int, total: int, reel: Dict, dm: DownloadManager) -> bool:
+        """Open one reel and queue its video; False if none was found."""
+        self.log(f"\n🎥 [{i + 1}/{total}] Opening reel {reel['id']}…")
+        dm.begin_post(reel["id"], reel["url"])
+        n = 0
+        try:
+            self.driver.get(reel["url"])
+            self._sleep(3, 5)
+
+            url = self._best_reel_url(reel["id"])
+            if url:
+                dm.enqueue_reel(url, reel["id"])
+                n = 1
+            else:
+                self.log(f"    ⚠️  Could not extract video for {reel['id']}")
+        except Exception as exc:
+            self.log(f"    ❌ Error: {str(exc)[:150]}")
+        finally:
+            dm.end_post(reel["id"], n)
+
+        self._sleep(2, 4)
+        return n > 0
 
     def _best_reel_url(self, rid: str) -> Optional[str]:
         """Try several strategies to get the best-quality reel URL."""
 
+        # wait (up to 10 s) for the player, one bundle per poll
+        bundle = read_bundle(self.driver, links=False)
+        deadline = time.time() + 10
+        while bundle.first_video is None and time.time() < deadline and not self.should_stop():
+            time.sleep(0.25)
+            bundle = read_bundle(self.driver, links=False)
+
         # 1 – direct <video> src
-        try:
-            vid = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "video"))
-            )
-            s = vid.get_attribute("src")
-            if s and s.startswith("http"):
-                self.log(f"    🎯 Direct video src found")
-                return s
-        except TimeoutException:
-            pass
+        s = bundle.first_video
+        if s and s.startswith("http"):
+            self.log(f"    🎯 Direct video src found")
+            return s
 
         # 2 – <video><source> elements
-        try:
-            best, best_q = None, 0
-            for src_el in self.driver.find_elements(
-                By.CSS_SELECTOR, "video source"
-            ):
-                s = src_el.get_attribute("src")
-                if s and ".mp4" in s:
-                    q = self._guess_quality(s)
-                    if q > best_q:
-                        best_q, best = q, s
-            if best:
-                self.log("    🎯 Best <source> element selected")
-                return best
-        except Exception:
-            pass
+        best, best_q = None, 0
+        for s in bundle.sources:
+            if ".mp4" in s:
+                q = self._guess_quality(s)
+                if q > best_q:
+                    best_q, best = q, s
+        if best:
+            self.log("    🎯 Best <source> element selected")
+            return best
 
         # 3 – embedded page JSON / og:video
-        url = self._video_from_page(rid)
+        url = self._video_from_page(rid, bundle)
         if url:
             return url
 
@@ -663,34 +940,22 @@ class InstagramBot:
 
     # ── video extraction helpers ───────────────────────────────
 
-    def _video_from_page(self, pid: str) -> Optional[str]:
-        """Scrape video URL from meta tags / inline JSON."""
+    def _video_from_page(self, pid: str, bundle: PageBundle) -> Optional[str]:
+        """Video URL from og:video, else the best rendition in the page data."""
         try:
-            for m in self.driver.find_elements(
-                By.CSS_SELECTOR, 'meta[property="og:video"]'
-            ):
-                c = m.get_attribute("content")
-                if c and ".mp4" in c:
-                    self.log(f"    🎯 og:video meta for {pid}")
-                    return c
-
-            page = self.driver.page_source
-            patterns = [
-                r'"video_url"\s*:\s*"([^"]+\.mp4[^"]*)"',
-                r'"src"\s*:\s*"(https?://[^"]+\.mp4[^"]*)"',
-                r'"video_versions"\s*:\s*\[.*?"url"\s*:\s*"([^"]+)"',
-            ]
-            best, best_sz = None, 0
-            for pat in patterns:
-                for raw in re.findall(pat, page):
-                    u = raw.replace("\\u0026", "&").replace("\\/", "/")
-                    if u.startswith("http"):
-                        sz = self._head_size(u)
-                        if sz > best_sz:
-                            best_sz, best = sz, u
+            c = bundle.og_video
+            if c and ".mp4" in c:
+                self.log(f"    🎯 og:video meta for {pid}")
+                return c
+
+            candidates = candidates_from_json(read_inline_json(self.driver), pid)
+            if not candidates:
+                candidates = candidates_from_source(self.driver.page_source)
+            best, size = best_video(candidates)
             if best:
                 self.log(
-                    f"    🎯 Page-data video ({best_sz // 1024} KB)"
+                    f"    🎯 Page-data video ({size // 1024} KB)" if size
+                    else "    🎯 Page-data video (largest rendition)"
                 )
                 return best
         except Exception:
@@ -723,25 +988,6 @@ class InstagramBot:
                 return r
         return 500
 
-    @staticmethod
-    def _head_size(url: str) -> int:
-        try:
-            r = http_requests.head(
-                url,
-                headers={
-                    "User-Agent": (
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) "
-                        "Gecko/20100101 Firefox/128.0"
-                    ),
-                    "Referer": "https://www.instagram.com/",
-                },
-                timeout=10,
-                allow_redirects=True,
-            )
-            return int(r.headers.get("content-length", 0))
-        except Exception:
-            return 0
-
     # ── Misc helpers ───────────────────────────────────────────
 
     @staticmethod
@@ -779,20 +1025,28 @@ class InstagramBot:
     ) -> bool:
         """Full execution pipeline."""
         try:
-            # 1 – browser
-            if not self.setup_browser():
+            # 1 – browser (with the saved session, if any)
+            if not self.setup_browser(username):
                 return False
             if self.should_stop():
                 return False
 
-            # 2 – login
-            ok, msg = self.login(username, password)
-            if not ok:
-                self.log(f"❌ Login failed: {msg}")
-                return False
+            # 2 – login, unless the restored session is still valid
+            if self.session_restored and self._verify_login(quick=True):
+                self.log("✅ Saved session is valid — skipping login")
+            else:
+                if self.session_restored:
+                    self.log("🔑 Saved session expired — logging in")
+                    self.config.clear_session(username)
+                    self.driver.delete_all_cookies()
+                ok, msg = self.login(username, password)
+                if not ok:
+                    self.log(f"❌ Login failed: {msg}")
+                    return False
+                self._save_session(username)
+                self._sleep(2, 4)
             if self.should_stop():
                 return False
-            self._sleep(2, 4)
 
             # 3 – profile
             ok, result = self.navigate_to_profile(target)
@@ -803,14 +1057,49 @@ class InstagramBot:
             if self.should_stop():
                 return False
 
-            # 4 – download manager
-            dm = DownloadManager(base_dir, target_user, self.log)
+            # 4 – download manager (shared keep-alive pools sized to it)
+            workers = self.config.get_download_workers()
+            HttpClient.configure(
+                pool_maxsize=max(workers, self.config.get_http_pool_size()),
+            )
+            RateLimiter.configure(self.config.get_request_rate(), self.log)
+            BandwidthLimiter.configure(self.config.get_bandwidth_limit() * 1024)
+            dm_options = dict(
+                link_mode=self.config.get_dedup_link_mode(),
+                transcode_policy=self.config.get_transcode_policy(),
+                jpeg_quality=self.config.get_jpeg_quality(),
+                bandwidth_limit=self.config.get_run_bandwidth_limit() * 1024,
+                segment_threshold=self.config.get_segment_threshold_mb() * 1024 * 1024,
+                segment_connections=self.config.get_segment_connections(),
+            )
+            backend = self.config.get_download_backend()
+            if backend == "asyncio" and not AsyncDownloadManager.available():
+                self.log("asyncio backend needs 'aiohttp' — using worker threads")
+                backend = "threads"
+            if backend == "asyncio":
+                dm = AsyncDownloadManager(
+                    base_dir, target_user, self.log,
+                    concurrency=self.config.get_async_concurrency(),
+                    limit_per_host=max(workers, self.config.get_http_pool_size()),
+                    **dm_options,
+                )
+            else:
+                dm = DownloadManager(base_dir, target_user, self.log, workers=workers, **dm_options)
+            self.log(f"Download backend: {backend} ({dm.worker_count} concurrent)")
             self.download_manager = dm
             dm.start_timer()
+            dm.start_workers()
 
-            # 5 – collect posts
-            self.collect_all_posts()
+            # 5 – collect posts (incremental once a full sync has finished)
+            incremental = (
+                self.config.get_incremental_sync()
+                and dm.manifest.get_state("full_sync_at") is not None
+            )
+            self.collect_all_posts(dm.completed_posts if incremental else None)
+            if incremental:
+                self._add_partial_posts(dm)
             if self.should_stop():
+                dm.join(cancel=True)
                 self.log(dm.get_summary())
                 return False
 
@@ -826,7 +1115,13 @@ class InstagramBot:
                 if not self.should_stop():
                     self.process_image_posts(dm)
 
-            # 7 – summary
+            # 7 – drain download queue, then summary
+            dm.join(cancel=self.should_stop())
+            if not self.should_stop():
+                now = str(time.time())
+                dm.manifest.set_state("last_sync_at", now)
+                if self.reached_grid_end:
+                    dm.manifest.set_state("full_sync_at", now)
             total_posts = len(self.image_posts) + len(self.reel_posts)
             self.log(dm.get_summary(total_posts))
             return True
@@ -839,10 +1134,15 @@ class InstagramBot:
             self.cleanup()
 
     def cleanup(self):
+        if self.download_manager:
+            self.download_manager.join(cancel=True)
+        if self.pool:
+            self.pool.close()
+            self.pool = None
         try:
             if self.driver:
                 self.log("🧹 Closing browser…")
-                self.driver.quit()
+                self._quit_browser(self.driver)
                 self.driver = None
         except Exception:
             pass
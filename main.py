@@ -13,6 +13,7 @@ Requirements:
 
 import sys
 import os
+import multiprocessing
 
 # Fix Windows console encoding for Unicode
 if sys.platform == "win32":
@@ -35,4 +36,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()   # transcoder process pool in frozen builds
     main()
@@ -0,0 +1,267 @@
+"""
+INSTAJECTION — Per-profile Download Manifest & Global Content Index.
+SQLite record of every downloaded media file and finished post, stored at
+downloads/<user>/manifest.sqlite3, so re-syncs can skip whole posts before
+the browser ever opens them. A second database under downloads/ maps
+SHA-256 digests to stored files for cross-profile deduplication.
+"""
+
+import re
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+
+class DownloadManifest:
+    """Thread-safe SQLite manifest keyed by post ID and media index."""
+
+    FILENAME = "manifest.sqlite3"
+
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_COMPLETE = "complete"     # post: every media item saved
+    STATUS_PARTIAL = "partial"       # post: visited, something failed
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS media (
+            post_id      TEXT    NOT NULL,
+            media_index  INTEGER NOT NULL,
+            kind         TEXT    NOT NULL,
+            filename     TEXT    NOT NULL,
+            url          TEXT,
+            size         INTEGER,
+            sha256       TEXT,
+            asset_key    TEXT,
+            status       TEXT    NOT NULL,
+            updated_at   REAL    NOT NULL,
+            PRIMARY KEY (post_id, media_index, kind)
+        );
+        CREATE INDEX IF NOT EXISTS media_filename ON media (filename);
+        CREATE TABLE IF NOT EXISTS posts (
+            post_id      TEXT PRIMARY KEY,
+            url          TEXT,
+            status       TEXT    NOT NULL,
+            media_count  INTEGER NOT NULL DEFAULT 0,
+            updated_at   REAL    NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key          TEXT PRIMARY KEY,
+            value        TEXT
+        );
+    """
+
+    def __init__(self, profile_dir: Path):
+        self.path = Path(profile_dir) / self.FILENAME
+        self.is_new = not self.path.exists()
+        self._lock = threading.Lock()
+        # Shared by the scraper thread and the download workers
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self._SCHEMA)
+        self._migrate()
+        self._db.execute("CREATE INDEX IF NOT EXISTS media_asset ON media (asset_key)")
+        self._db.commit()
+
+    def _migrate(self):
+        """Add columns introduced after a manifest was first created."""
+        cols = {r[1] for r in self._db.execute("PRAGMA table_info(media)")}
+        if "asset_key" not in cols:
+            self._db.execute("ALTER TABLE media ADD COLUMN asset_key TEXT")
+        cols = {r[1] for r in self._db.execute("PRAGMA table_info(posts)")}
+        if "url" not in cols:
+            self._db.execute("ALTER TABLE posts ADD COLUMN url TEXT")
+
+    # ── Queries ────────────────────────────────────────────────
+
+    def done_filenames(self) -> Set[str]:
+        """Filenames of every successfully saved media file."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT filename FROM media WHERE status = ?", (self.STATUS_DONE,)
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def done_asset_keys(self) -> Set[str]:
+        """Canonical CDN asset keys of every successfully saved file."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT asset_key FROM media WHERE status = ? AND asset_key IS NOT NULL",
+                (self.STATUS_DONE,),
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def completed_posts(self) -> Set[str]:
+        """IDs of posts whose media were all saved in an earlier run."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT post_id FROM posts WHERE status = ?", (self.STATUS_COMPLETE,)
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def partial_posts(self) -> List[Tuple[str, str]]:
+        """(post_id, url) of visited posts that still miss some media."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT post_id, url FROM posts WHERE status = ? AND url IS NOT NULL",
+                (self.STATUS_PARTIAL,),
+            ).fetchall()
+        return [(r[0], r[1]) for r in rows]
+
+    def get_state(self, key: str) -> Optional[str]:
+        """Read a value persisted by an earlier run (e.g. ``full_sync_at``)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM sync_state WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    # ── Updates ────────────────────────────────────────────────
+
+    def set_state(self, key: str, value: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+            self._db.commit()
+
+    def record_media(self, post_id: str, index: int, kind: str, filename: str,
+                     url: Optional[str], size: Optional[int], status: str,
+                     sha256: Optional[str] = None, asset_key: Optional[str] = None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO media "
+                "(post_id, media_index, kind, filename, url, size, sha256, asset_key, "
+                "status, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (post_id, index, kind, filename, url, size, sha256, asset_key,
+                 status, time.time()),
+            )
+            self._db.commit()
+
+    def mark_post(self, post_id: str, status: str, media_count: int,
+                  url: Optional[str] = None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO posts (post_id, url, status, media_count, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (post_id, url, status, media_count, time.time()),
+            )
+            self._db.commit()
+
+    def import_files(self, username: str, files: Iterable[Path]):
+        """Seed a fresh manifest from files downloaded by older versions.
+
+        Only media rows are created; posts are marked complete after the
+        next visit confirms nothing is missing.
+        """
+        img = re.compile(rf"^{re.escape(username)}_img_(.+)_(\d+)\.\w+$")
+        reel = re.compile(rf"^{re.escape(username)}_reel_(.+)\.\w+$")
+        now = time.time()
+        rows = []
+        for f in files:
+            m = img.match(f.name)
+            if m:
+                rows.append((m.group(1), int(m.group(2)) - 1, "image", f.name))
+                continue
+            m = reel.match(f.name)
+            if m:
+                rows.append((m.group(1), 0, "reel", f.name))
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO media "
+                "(post_id, media_index, kind, filename, url, size, sha256, status, updated_at) "
+                "VALUES (?, ?, ?, ?, NULL, NULL, NULL, ?, ?)",
+                [(pid, idx, kind, name, self.STATUS_DONE, now) for pid, idx, kind, name in rows],
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._db.close()
+            except Exception:
+                pass
+
+
+class ContentIndex:
+    """Global SHA-256 → file index shared by every profile under downloads/."""
+
+    FILENAME = "content_index.sqlite3"
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS content (
+            sha256       TEXT PRIMARY KEY,
+            path         TEXT    NOT NULL,
+            size         INTEGER NOT NULL,
+            updated_at   REAL    NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS sources (
+            url_key      TEXT PRIMARY KEY,
+            sha256       TEXT    NOT NULL
+        );
+    """
+
+    def __init__(self, root_dir: Path):
+        self.root_dir = Path(root_dir)
+        self.path = self.root_dir / self.FILENAME
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self._SCHEMA)
+        self._db.commit()
+
+    def lookup(self, sha256: str) -> Optional[Path]:
+        """Stored file holding this content, if it still exists."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT path FROM content WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        if row:
+            path = self.root_dir / row[0]
+            if path.is_file():
+                return path
+        return None
+
+    def lookup_source(self, url_key: str) -> Optional[Tuple[str, Path]]:
+        """(sha256, stored file) previously downloaded from this source."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT sha256 FROM sources WHERE url_key = ?", (url_key,)
+            ).fetchone()
+        if not row:
+            return None
+        path = self.lookup(row[0])
+        return (row[0], path) if path else None
+
+    def add(self, sha256: str, path: Path, url_key: Optional[str] = None):
+        """Register stored content; the first existing copy stays canonical."""
+        rel = Path(path).resolve().relative_to(self.root_dir.resolve()).as_posix()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT path FROM content WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            if row is None or not (self.root_dir / row[0]).is_file():
+                self._db.execute(
+                    "INSERT OR REPLACE INTO content (sha256, path, size, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (sha256, rel, Path(path).stat().st_size, time.time()),
+                )
+            if url_key:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sources (url_key, sha256) VALUES (?, ?)",
+                    (url_key, sha256),
+                )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._db.close()
+            except Exception:
+                pass
@@ -0,0 +1,142 @@
+"""
+INSTAJECTION — Media Format Detection.
+Identifies the real container of a download from its first bytes and
+Content-Type header, so the file is named correctly before it is written,
+and checks finished files for truncation from their structure alone.
+"""
+
+import os
+import struct
+from pathlib import Path
+from typing import Optional
+
+
+EXTENSIONS = {
+    "jpeg": ".jpg",
+    "webp": ".webp",
+    "png": ".png",
+    "heic": ".heic",
+    "mp4": ".mp4",
+}
+
+_CONTENT_TYPES = {
+    "image/jpeg": "jpeg",
+    "image/jpg": "jpeg",
+    "image/webp": "webp",
+    "image/png": "png",
+    "image/heic": "heic",
+    "image/heif": "heic",
+    "video/mp4": "mp4",
+    "video/quicktime": "mp4",
+}
+
+_HEIC_BRANDS = (b"heic", b"heix", b"heim", b"heis", b"hevc", b"mif1", b"msf1")
+
+
+def sniff(head: bytes, content_type: Optional[str] = None) -> Optional[str]:
+    """Return 'jpeg', 'webp', 'png', 'heic', 'mp4' or None.
+
+    Magic bytes win over the header, since the CDN often labels WebP
+    bodies as ``image/jpeg``.
+    """
+    if head[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if head[4:8] == b"ftyp":
+        return "heic" if head[8:12] in _HEIC_BRANDS else "mp4"
+    if content_type:
+        return _CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+    return None
+
+
+# ── Structural validation ──────────────────────────────────────
+
+_PNG_IEND = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+_TAIL = 64          # JPEG encoders may pad a few bytes after EOI
+_MAX_BOXES = 4096   # top-level ISO-BMFF boxes walked before giving up
+
+
+def _check_jpeg(fh, size: int) -> Optional[str]:
+    fh.seek(max(0, size - _TAIL))
+    if b"\xff\xd9" not in fh.read(_TAIL):
+        return "JPEG end-of-image marker missing"
+    return None
+
+
+def _check_webp(fh, size: int) -> Optional[str]:
+    fh.seek(4)
+    riff = struct.unpack("<I", fh.read(4))[0]
+    expected = 8 + riff + (riff & 1)
+    if size < expected:
+        return f"WebP RIFF declares {expected} bytes, file has {size}"
+    return None
+
+
+def _check_png(fh, size: int) -> Optional[str]:
+    fh.seek(max(0, size - len(_PNG_IEND)))
+    if fh.read(len(_PNG_IEND)) != _PNG_IEND:
+        return "PNG IEND chunk missing"
+    return None
+
+
+def _check_isobmff(fh, size: int, kind: str) -> Optional[str]:
+    """Walk top-level boxes: sizes must tile the file exactly."""
+    seen = set()
+    pos = 0
+    for _ in range(_MAX_BOXES):
+        if pos == size:
+            break
+        if size - pos < 8:
+            return f"trailing {size - pos} bytes after the last box"
+        fh.seek(pos)
+        header = fh.read(16)
+        box_size, box_type = struct.unpack(">I4s", header[:8])
+        if box_size == 1:
+            if len(header) < 16:
+                return "truncated 64-bit box header"
+            box_size = struct.unpack(">Q", header[8:16])[0]
+        elif box_size == 0:
+            box_size = size - pos               # box runs to end of file
+        if box_size < 8:
+            return f"invalid box size at offset {pos}"
+        if pos + box_size > size:
+            return (f"'{box_type.decode('latin-1')}' box needs "
+                    f"{pos + box_size - size} more bytes")
+        seen.add(box_type)
+        pos += box_size
+    else:
+        return None     # pathological box count; sizes were consistent so far
+    if kind == "mp4":
+        missing = [b.decode() for b in (b"moov", b"mdat") if b not in seen]
+        if missing:
+            return f"MP4 missing {'/'.join(missing)} box"
+    elif b"meta" not in seen:
+        return "HEIF missing meta box"
+    return None
+
+
+_CHECKS = {"jpeg": _check_jpeg, "webp": _check_webp, "png": _check_png}
+
+
+def validate(path: Path, kind: Optional[str], size: Optional[int] = None) -> Optional[str]:
+    """Return why ``path`` looks truncated or malformed, or None if it looks whole.
+
+    Only headers, box sizes and trailing markers are read — nothing is
+    decoded — so this is cheap enough to run on every download. Unknown
+    formats pass.
+    """
+    if size is None:
+        size = os.path.getsize(path)
+    if size == 0:
+        return "empty file"
+    try:
+        with open(path, "rb") as fh:
+            if kind in ("mp4", "heic"):
+                return _check_isobmff(fh, size, kind)
+            check = _CHECKS.get(kind)
+            return check(fh, size) if check else None
+    except (OSError, struct.error) as exc:
+        return f"unreadable ({exc})"
@@ -0,0 +1,148 @@
+"""
+INSTAJECTION — In-page Network Capture.
+Hooks the page's fetch() and XMLHttpRequest so every Instagram JSON
+response that carries media (feed pages, GraphQL queries) is copied into
+a buffer while the grid scrolls. The bot drains the buffer over WebDriver
+and turns it into download jobs without visiting each post.
+
+Selenium's Firefox driver exposes no response bodies (WebDriver BiDi
+network events carry headers only), and an intercepting proxy would need
+its own CA certificate, so the capture runs inside the page instead.
+"""
+
+from typing import Dict, List, Optional
+
+from post_data import MARKERS, PostMedia, parse_text
+
+
+_HOOK_JS = """
+const markers = arguments[0], limit = arguments[1];
+if (window.__ijCapture) return false;
+const cap = window.__ijCapture = {bodies: [], bytes: 0, dropped: 0};
+const keep = (url, text) => {
+    if (typeof text !== 'string' || !markers.some(m => text.includes(m))) return;
+    if (cap.bytes + text.length > limit) { cap.dropped++; return; }
+    cap.bodies.push(text);
+    cap.bytes += text.length;
+};
+
+const origFetch = window.fetch;
+window.fetch = function(...args) {
+    return origFetch.apply(this, args).then(resp => {
+        try {
+            const type = resp.headers.get('content-type') || '';
+            if (type.includes('json') || type.includes('javascript') || type.includes('text')) {
+                resp.clone().text().then(t => keep(resp.url, t)).catch(() => {});
+            }
+        } catch (e) {}
+        return resp;
+    });
+};
+
+const origOpen = XMLHttpRequest.prototype.open;
+XMLHttpRequest.prototype.open = function(method, url, ...rest) {
+    this.addEventListener('load', () => {
+        try {
+            if (this.responseType === '' || this.responseType === 'text') {
+                keep(url, this.responseText);
+            }
+        } catch (e) {}
+    });
+    return origOpen.call(this, method, url, ...rest);
+};
+return true;
+"""
+
+_DRAIN_JS = """
+const cap = window.__ijCapture;
+if (!cap) return null;
+const out = {bodies: cap.bodies, dropped: cap.dropped};
+cap.bodies = []; cap.bytes = 0; cap.dropped = 0;
+return out;
+"""
+
+# First page of the grid is server-rendered into JSON <script> tags
+_INLINE_JS = """
+const markers = arguments[0];
+const out = [];
+document.querySelectorAll('script[type="application/json"]').forEach(s => {
+    const t = s.textContent || '';
+    if (markers.some(m => t.includes(m))) out.push(t);
+});
+return out;
+"""
+
+
+def read_inline_json(driver) -> List[str]:
+    """Raw JSON <script> bodies of the current page that carry media."""
+    return list(driver.execute_script(_INLINE_JS, list(MARKERS)) or [])
+
+
+def read_inline_posts(driver) -> List[PostMedia]:
+    """Posts in the JSON the server rendered into the current page."""
+    posts: List[PostMedia] = []
+    for text in read_inline_json(driver):
+        posts.extend(parse_text(text))
+    return posts
+
+
+class NetworkCapture:
+    """Collects post media from the page's own API responses."""
+
+    BUFFER_LIMIT = 32 * 1024 * 1024    # chars held in the page between drains
+
+    def __init__(self, driver, owner: Optional[str] = None, log_callback=None):
+        self.driver = driver
+        self.owner = owner.lower() if owner else None
+        self.log = log_callback or print
+        self.posts: Dict[str, PostMedia] = {}
+        self.responses = 0
+        self.dropped = 0
+
+    def install(self) -> bool:
+        """Hook fetch/XHR in the current document and read the inline data.
+
+        The hook lives in the page, so call this again after any full
+        navigation (``driver.get``); in-app navigation keeps it.
+        """
+        try:
+            self.driver.execute_script(_HOOK_JS, list(MARKERS), self.BUFFER_LIMIT)
+            for post in read_inline_posts(self.driver):
+                self._add(post)
+            return True
+        except Exception as exc:
+            self.log(f"⚠️  Network capture unavailable: {str(exc)[:100]}")
+            return False
+
+    def drain(self) -> int:
+        """Pull buffered responses out of the page; returns newly found posts."""
+        try:
+            data = self.driver.execute_script(_DRAIN_JS)
+        except Exception:
+            return 0
+        if not data:
+            return 0
+        before = len(self.posts)
+        self.dropped += int(data.get("dropped") or 0)
+        for text in data.get("bodies") or []:
+            self.responses += 1
+            self._ingest(text)
+        return len(self.posts) - before
+
+    def _ingest(self, text: str):
+        for post in parse_text(text):
+            self._add(post)
+
+    def _add(self, post: PostMedia):
+        if self.owner and post.owner and post.owner.lower() != self.owner:
+            return          # suggested / related accounts' media
+        known = self.posts.get(post.post_id)
+        if known is None or len(post.items) > len(known.items):
+            self.posts[post.post_id] = post
+
+    def get(self, post_id: str) -> Optional[PostMedia]:
+        return self.posts.get(post_id)
+
+    def links(self) -> List[str]:
+        """Permalinks of every captured post."""
+        return [p.url for p in self.posts.values()]
@@ -0,0 +1,95 @@
+"""
+INSTAJECTION — Batched Page Extraction.
+One JavaScript call returns everything the bot reads from the current
+page state — post links, main-post images with their srcset, video
+sources and og:video — instead of a WebDriver round trip per element.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional
+
+
+class ImageCandidate(NamedTuple):
+    src: str
+    srcset: str
+    width: int              # rendered naturalWidth (0 until loaded)
+
+
+class PageBundle(NamedTuple):
+    """Snapshot of the media-relevant parts of the DOM."""
+    links: List[str]                    # /p/ and /reel/ hrefs, document order
+    images: List[ImageCandidate]        # main post only (suggestions excluded)
+    videos: List[str]                   # post <video> src (http or blob:)
+    first_video: Optional[str]          # first <video> anywhere (reel pages)
+    sources: List[str]                  # <video><source> src
+    og_video: Optional[str]
+
+    @classmethod
+    def empty(cls) -> "PageBundle":
+        return cls([], [], [], None, [], None)
+
+
+_BUNDLE_JS = """
+const wantLinks = arguments[0], wantMedia = arguments[1];
+const out = {links: [], images: [], videos: [], first_video: null, sources: [], og_video: null};
+
+if (wantLinks) {
+    const seen = new Set();
+    document.querySelectorAll('a[href*="/p/"], a[href*="/reel/"]').forEach(a => {
+        const href = a.href;
+        if (href && !seen.has(href)) { seen.add(href); out.links.push(href); }
+    });
+}
+
+if (wantMedia) {
+    const root = document.querySelector('article') || document.querySelector('main') || document.body;
+    const suggested = el => {
+        let p = el.parentElement;
+        for (let i = 0; i < 12 && p; i++, p = p.parentElement) {
+            const txt = (p.innerText || '').toLowerCase();
+            if (txt.includes('more posts') || txt.includes('suggested for you') ||
+                txt.includes('related accounts')) return true;
+        }
+        return false;
+    };
+    root.querySelectorAll('img').forEach(img => {
+        const src = img.getAttribute('src') || '';
+        if (src && !suggested(img)) {
+            out.images.push({src: src, srcset: img.getAttribute('srcset') || '',
+                             width: img.naturalWidth || 0});
+        }
+    });
+    const vsrc = v => v.getAttribute('src') || v.currentSrc || '';
+    document.querySelectorAll("article video, div[role='presentation'] video").forEach(v => {
+        const src = vsrc(v);
+        if (src && !out.videos.includes(src)) out.videos.push(src);
+    });
+    const first = document.querySelector('video');
+    out.first_video = first ? (vsrc(first) || null) : null;
+    document.querySelectorAll('video source').forEach(s => {
+        const src = s.getAttribute('src') || '';
+        if (src) out.sources.push(src);
+    });
+    const og = document.querySelector('meta[property="og:video"]');
+    out.og_video = og ? og.getAttribute('content') : null;
+}
+return out;
+"""
+
+
+def read_bundle(driver, links: bool = True, media: bool = True) -> PageBundle:
+    """Run the extraction script once; an empty bundle on any error."""
+    try:
+        raw: Dict[str, Any] = driver.execute_script(_BUNDLE_JS, links, media) or {}
+    except Exception:
+        return PageBundle.empty()
+    return PageBundle(
+        links=list(raw.get("links") or []),
+        images=[
+            ImageCandidate(i.get("src", ""), i.get("srcset", ""), int(i.get("width") or 0))
+            for i in raw.get("images") or []
+        ],
+        videos=list(raw.get("videos") or []),
+        first_video=raw.get("first_video"),
+        sources=list(raw.get("sources") or []),
+        og_video=raw.get("og_video"),
+    )
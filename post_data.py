@@ -0,0 +1,240 @@
+"""
+INSTAJECTION — Post Data Parser.
+Turns Instagram's own JSON (feed / GraphQL responses and the data embedded
+in the page) into per-post media lists, so posts can be downloaded without
+opening each one in the browser.
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from cdn_url import asset_key
+
+
+class MediaItem(NamedTuple):
+    """One file of a post, in carousel order."""
+    kind: str               # 'image' or 'video'
+    url: str
+    index: int
+
+
+class PostMedia(NamedTuple):
+    """Every downloadable file of one post."""
+    post_id: str            # shortcode, as in /p/<code>/
+    url: str                # permalink
+    is_reel: bool
+    owner: Optional[str]
+    items: List[MediaItem]
+
+    @property
+    def images(self) -> List[MediaItem]:
+        return [m for m in self.items if m.kind == "image"]
+
+    @property
+    def videos(self) -> List[MediaItem]:
+        return [m for m in self.items if m.kind == "video"]
+
+
+class VideoCandidate(NamedTuple):
+    """One rendition of a post's video with the metadata published for it."""
+    url: str
+    width: int = 0
+    height: int = 0
+    bitrate: int = 0        # bits/s, 0 if unknown
+
+    @property
+    def rank(self) -> Tuple[int, int]:
+        return self.width * self.height, self.bitrate
+
+
+BASE_URL = "https://www.instagram.com"
+
+# Cheap pre-filter for response bodies worth parsing
+MARKERS = ("image_versions2", "video_versions", "display_url", "carousel_media")
+
+
+# ── Candidate selection ────────────────────────────────────────
+
+def _area(c: Dict[str, Any]) -> int:
+    try:
+        return int(c.get("width") or 0) * int(c.get("height") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _best_url(candidates: Any) -> Optional[str]:
+    """URL of the largest rendition in an ``image_versions2`` / ``video_versions`` list."""
+    if not isinstance(candidates, list):
+        return None
+    best = max(
+        (c for c in candidates if isinstance(c, dict) and c.get("url")),
+        key=_area, default=None,
+    )
+    return best["url"] if best else None
+
+
+# ── Node shapes ────────────────────────────────────────────────
+
+def _items_v1(node: Dict[str, Any]) -> List[MediaItem]:
+    """Media of an API v1 / xdt node (``carousel_media`` or a single file)."""
+    children = node.get("carousel_media") or [node]
+    items: List[MediaItem] = []
+    for child in children:
+        if not isinstance(child, dict):
+            continue
+        video = _best_url(child.get("video_versions"))
+        if video:
+            items.append(MediaItem("video", video, len(items)))
+            continue
+        image = _best_url((child.get("image_versions2") or {}).get("candidates"))
+        if image:
+            items.append(MediaItem("image", image, len(items)))
+    return items
+
+
+def _items_graphql(node: Dict[str, Any]) -> List[MediaItem]:
+    """Media of a legacy GraphQL node (``edge_sidecar_to_children`` or single)."""
+    edges = (node.get("edge_sidecar_to_children") or {}).get("edges")
+    children = [e.get("node") for e in edges if isinstance(e, dict)] if edges else [node]
+    items: List[MediaItem] = []
+    for child in children:
+        if not isinstance(child, dict):
+            continue
+        if child.get("is_video") and child.get("video_url"):
+            items.append(MediaItem("video", child["video_url"], len(items)))
+            continue
+        resources = child.get("display_resources")
+        image = _best_url([
+            {"url": r.get("src"), "width": r.get("config_width"), "height": r.get("config_height")}
+            for r in resources if isinstance(r, dict)
+        ]) if isinstance(resources, list) else None
+        image = image or child.get("display_url")
+        if image:
+            items.append(MediaItem("image", image, len(items)))
+    return items
+
+
+def _unique(items: List[MediaItem]) -> List[MediaItem]:
+    """Drop repeats of one CDN asset (e.g. a slide listed at two sizes)."""
+    seen, out = set(), []
+    for item in items:
+        key = asset_key(item.url)
+        if key not in seen:
+            seen.add(key)
+            out.append(item._replace(index=len(out)))
+    return out
+
+
+def _owner(node: Dict[str, Any]) -> Optional[str]:
+    for key in ("user", "owner"):
+        user = node.get(key)
+        if isinstance(user, dict) and user.get("username"):
+            return user["username"]
+    return None
+
+
+def _to_post(node: Dict[str, Any]) -> Optional[PostMedia]:
+    code = node.get("code") or node.get("shortcode")
+    if not isinstance(code, str) or not code:
+        return None
+    if "image_versions2" in node or "video_versions" in node or "carousel_media" in node:
+        items = _items_v1(node)
+        is_reel = node.get("product_type") == "clips"
+    elif "display_url" in node or "edge_sidecar_to_children" in node:
+        items = _items_graphql(node)
+        is_reel = node.get("product_type") == "clips"
+    else:
+        return None
+    items = _unique(items)
+    if not items:
+        return None
+    path = "reel" if is_reel else "p"
+    return PostMedia(code, f"{BASE_URL}/{path}/{code}/", is_reel, _owner(node), items)
+
+
+def _walk(obj: Any) -> Iterator[Dict[str, Any]]:
+    """Every dict in a JSON tree (iterative, so deep payloads are fine)."""
+    stack = [obj]
+    while stack:
+        cur = stack.pop()
+        if isinstance(cur, dict):
+            yield cur
+            stack.extend(cur.values())
+        elif isinstance(cur, list):
+            stack.extend(cur)
+
+
+# ── Public API ─────────────────────────────────────────────────
+
+def extract_posts(payload: Any) -> List[PostMedia]:
+    """All posts with downloadable media found anywhere in a decoded payload.
+
+    Carousel children are folded into their parent and never reported as
+    posts of their own.
+    """
+    posts: Dict[str, PostMedia] = {}
+    children = set()
+    for node in _walk(payload):
+        post = _to_post(node)
+        if post is None:
+            continue
+        for child in node.get("carousel_media") or []:
+            if isinstance(child, dict) and child.get("code"):
+                children.add(child["code"])
+        known = posts.get(post.post_id)
+        if known is None or len(post.items) > len(known.items):
+            posts[post.post_id] = post
+    return [p for code, p in posts.items() if code not in children or len(p.items) > 1]
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def video_candidates(payload: Any, post_id: str) -> List[VideoCandidate]:
+    """Every video rendition of ``post_id`` in a decoded payload, with its
+    width / height / bitrate (``video_versions`` or legacy ``video_url``)."""
+    out: List[VideoCandidate] = []
+    for node in _walk(payload):
+        if (node.get("code") or node.get("shortcode")) != post_id:
+            continue
+        for child in node.get("carousel_media") or [node]:
+            if not isinstance(child, dict):
+                continue
+            for v in child.get("video_versions") or []:
+                if isinstance(v, dict) and v.get("url"):
+                    out.append(VideoCandidate(
+                        v["url"], _int(v.get("width")), _int(v.get("height")),
+                        _int(v.get("bandwidth") or v.get("bitrate")),
+                    ))
+            if child.get("video_url"):
+                dims = child.get("dimensions") or {}
+                out.append(VideoCandidate(
+                    child["video_url"], _int(dims.get("width")), _int(dims.get("height")),
+                ))
+    return out
+
+
+def parse_text(text: str) -> List[PostMedia]:
+    """Parse a raw response body: plain JSON, ``for (;;);``-guarded, or NDJSON."""
+    if not text or not any(m in text for m in MARKERS):
+        return []
+    text = text.strip()
+    if text.startswith("for (;;);"):
+        text = text[len("for (;;);"):]
+    try:
+        return extract_posts(json.loads(text))
+    except ValueError:
+        pass
+    posts: List[PostMedia] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                posts.extend(extract_posts(json.loads(line)))
+            except ValueError:
+                continue
+    return posts
@@ -0,0 +1,238 @@
+"""
+INSTAJECTION — Shared Request & Bandwidth Limiters.
+Per-host token buckets that every download and HEAD request draws from.
+Rates back off on throttling signals (429 / 503 / Retry-After) and
+recover gradually on success, so concurrent workers slow down together
+instead of each hammering the CDN on its own schedule. A byte-rate
+bucket caps total download bandwidth across all streams, and a sliding
+window meter reports the current throughput.
+"""
+
+import time
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Classic token bucket with an adjustable refill rate."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0        # Retry-After cooldown
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Take one token; return how long the caller must wait first."""
+        self._refill(now)
+        self.tokens -= 1.0
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        return max(wait, self.blocked_until - now)
+
+
+class RateLimiter:
+    """Per-host AIMD rate control shared by the whole process."""
+
+    DEFAULT_RATE = 8.0       # requests / second / host
+    MIN_RATE = 0.5
+    BURST = 8.0
+    INCREASE = 0.25          # additive recovery per successful response
+    DECREASE = 0.5           # multiplicative cut on a throttling signal
+    DEFAULT_COOLDOWN = 10.0  # seconds, when 429 has no Retry-After
+    MAX_COOLDOWN = 300.0
+    THROTTLE_STATUS = (429, 503)
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_rate: float = DEFAULT_RATE, log_callback=None):
+        self.max_rate = max(self.MIN_RATE, float(max_rate))
+        self.log = log_callback or (lambda msg: None)
+        self.throttle_events = 0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "RateLimiter":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def configure(cls, max_rate: float, log_callback=None):
+        """Replace the shared limiter (called once per run)."""
+        with cls._shared_lock:
+            cls._shared = cls(max_rate, log_callback)
+
+    # ── Internals ──────────────────────────────────────────────
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.max_rate, self.BURST)
+        return bucket
+
+    def _retry_after(self, value: Optional[str]) -> float:
+        """Seconds from a Retry-After header (delta or HTTP date)."""
+        if not value:
+            return self.DEFAULT_COOLDOWN
+        value = value.strip()
+        if value.isdigit():
+            return min(float(value), self.MAX_COOLDOWN)
+        try:
+            delta = parsedate_to_datetime(value).timestamp() - time.time()
+            return min(max(delta, 0.0), self.MAX_COOLDOWN)
+        except (TypeError, ValueError):
+            return self.DEFAULT_COOLDOWN
+
+    # ── Public API ─────────────────────────────────────────────
+
+    def reserve(self, url: str) -> float:
+        """Take a token for ``url``'s host; return the seconds to wait first.
+
+        Non-blocking, so event-loop callers can ``await asyncio.sleep``.
+        """
+        host = self._host(url)
+        with self._lock:
+            return self._bucket(host).reserve(time.monotonic())
+
+    def acquire(self, url: str):
+        """Block until a request to ``url``'s host is allowed."""
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    def cooldown(self, url: str) -> float:
+        """Seconds left before ``url``'s host may be contacted again."""
+        with self._lock:
+            bucket = self._buckets.get(self._host(url))
+            if bucket is None:
+                return 0.0
+            return max(0.0, bucket.blocked_until - time.monotonic())
+
+    def feedback(self, url: str, status: int, retry_after: Optional[str] = None):
+        """Adjust the host's rate from a response status."""
+        host = self._host(url)
+        with self._lock:
+            bucket = self._bucket(host)
+            if status in self.THROTTLE_STATUS:
+                pause = self._retry_after(retry_after)
+                bucket.rate = max(self.MIN_RATE, bucket.rate * self.DECREASE)
+                bucket.tokens = min(bucket.tokens, 0.0)
+                bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + pause)
+                self.throttle_events += 1
+                rate = bucket.rate
+            else:
+                if status < 400 and bucket.rate < self.max_rate:
+                    bucket.rate = min(self.max_rate, bucket.rate + self.INCREASE)
+                return
+        self.log(f"Throttled by {host} ({status}) — pausing {pause:.0f}s, "
+                 f"rate now {rate:.1f} req/s")
+
+
+class BandwidthLimiter:
+    """Byte-rate token bucket shared by every concurrent download stream.
+
+    Each chunk reserves its bytes under a lock and the caller sleeps off
+    any debt outside it, so the aggregate rate stays accurate no matter
+    how many streams draw from the same bucket. ``0`` means unlimited.
+    """
+
+    BURST_SECONDS = 0.25     # bucket depth, as a fraction of one second
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, bytes_per_sec: float = 0):
+        self.rate = max(0.0, float(bytes_per_sec))
+        self.burst = max(64 * 1024, self.rate * self.BURST_SECONDS)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "BandwidthLimiter":
+        """The process-wide (all runs) bandwidth cap."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def configure(cls, bytes_per_sec: float):
+        with cls._shared_lock:
+            cls._shared = cls(bytes_per_sec)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def reserve(self, nbytes: int) -> float:
+        """Charge ``nbytes``; return the seconds to wait to stay under the cap."""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= nbytes
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def consume(self, nbytes: int):
+        """Account for ``nbytes`` just received, sleeping if over the cap."""
+        wait = self.reserve(nbytes)
+        if wait > 0:
+            time.sleep(wait)
+
+
+class ThroughputMeter:
+    """Sliding-window byte counter for live throughput display."""
+
+    WINDOW = 3.0             # seconds
+
+    def __init__(self):
+        self.total_bytes = 0
+        self._samples: Deque[Tuple[float, int]] = deque()
+        self._window_bytes = 0
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        while self._samples and now - self._samples[0][0] > self.WINDOW:
+            self._window_bytes -= self._samples.popleft()[1]
+
+    def add(self, nbytes: int):
+        now = time.monotonic()
+        with self._lock:
+            self.total_bytes += nbytes
+            self._window_bytes += nbytes
+            self._samples.append((now, nbytes))
+            self._trim(now)
+
+    def rate(self) -> float:
+        """Bytes per second over the last ``WINDOW`` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            if not self._samples:
+                return 0.0
+            span = min(self.WINDOW, max(now - self._samples[0][0], 0.5))
+            return self._window_bytes / span
+
+    @staticmethod
+    def format_rate(bytes_per_sec: float) -> str:
+        if bytes_per_sec >= 1024 * 1024:
+            return f"{bytes_per_sec / (1024 * 1024):.1f} MB/s"
+        return f"{bytes_per_sec / 1024:.0f} KB/s"
@@ -0,0 +1,125 @@
+"""
+INSTAJECTION — Image Transcoding Stage.
+Re-encodes WebP images as JPEG in a process pool, so the CPU-heavy decode
+and encode uses every core and never blocks the download workers or the
+Selenium loop.
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from PIL import Image
+
+
+POLICIES = ("original", "jpeg", "progressive")
+
+
+def transcode_file(path: str, dest: str, policy: str, quality: int) -> Tuple[bool, str]:
+    """Convert the WebP at ``path`` to a JPEG at ``dest``; runs inside a pool process.
+
+    The JPEG is written to a temp file and renamed into place, then the
+    WebP is removed, so a hard-linked copy elsewhere is never rewritten and
+    a failed conversion leaves the WebP untouched. Returns (converted, note).
+    """
+    tmp = dest + ".tmp"
+    try:
+        with Image.open(path) as img:
+            if img.mode in ("RGBA", "P", "LA", "PA"):
+                img = img.convert("RGB")
+            img.save(
+                tmp, "JPEG",
+                quality=quality,
+                optimize=True,
+                progressive=(policy == "progressive"),
+            )
+        os.replace(tmp, dest)
+        if dest != path:
+            os.remove(path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return True, f"Converted WebP -> JPEG (quality {quality}%)"
+
+
+class Transcoder:
+    """Process-pool backed image re-encoder with completion tracking."""
+
+    def __init__(self, policy: str = "jpeg", quality: int = 100,
+                 workers: Optional[int] = None, log_callback=None):
+        self.policy = policy if policy in POLICIES else "jpeg"
+        self.quality = max(1, min(100, int(quality)))
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.log = log_callback or print
+
+        self.converted = 0
+        self.failed = 0
+        self.pending = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    @property
+    def enabled(self) -> bool:
+        return self.policy != "original"
+
+    def submit(self, path: Path, kind: Optional[str],
+               on_done: Optional[Callable[[Optional[Path]], None]] = None):
+        """Queue a sniffed WebP for re-encoding as ``<stem>.jpg``.
+
+        ``on_done`` receives the final path once the file is final, or None
+        if the conversion failed or was cancelled (the WebP stays as is).
+        Other formats (and every file under the 'original' policy) are
+        final already, so ``on_done`` runs immediately with ``path``.
+        """
+        path = Path(path)
+        if not self.enabled or kind != "webp":
+            if on_done:
+                on_done(path)
+            return
+        dest = path.with_suffix(".jpg")
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self.pending += 1
+            fut = self._pool.submit(
+                transcode_file, str(path), str(dest), self.policy, self.quality,
+            )
+        fut.add_done_callback(lambda f: self._finished(f, dest, on_done))
+
+    def _finished(self, fut: Future, dest: Path, on_done):
+        converted, failed = False, False
+        if not fut.cancelled():
+            try:
+                converted, note = fut.result()
+                if note:
+                    self.log(f"    {note}")
+            except Exception as exc:
+                failed = True
+                self.log(f"    Format conversion note: {dest.name}: {str(exc)[:80]}")
+        with self._lock:
+            self.pending -= 1
+            self.converted += int(converted)
+            self.failed += int(failed)
+            self._idle.notify_all()
+        if on_done:
+            try:
+                on_done(dest if converted else None)
+            except Exception:
+                pass
+
+    def join(self, cancel: bool = False):
+        """Wait for queued conversions (or drop them) and stop the pool."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        if cancel:
+            pool.shutdown(wait=False, cancel_futures=True)
+            return
+        with self._idle:
+            while self.pending > 0:
+                self._idle.wait(0.5)
+        pool.shutdown(wait=True)
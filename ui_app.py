@@ -13,6 +13,7 @@ from PIL import Image as PILImage
 
 from config import ConfigManager
 from instagram_bot import InstagramBot
+from rate_limiter import ThroughputMeter
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -78,6 +79,7 @@ class InstajectionApp(ctk.CTk):
 
         # ── Start log-queue poller ─────────────────────────────
         self._poll_log_queue()
+        self._poll_throughput()
 
         # ── Graceful close ─────────────────────────────────────
         self.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -234,6 +236,34 @@ class InstajectionApp(ctk.CTk):
         )
         self.remember_cb.place(x=x, y=y)
 
+        # ────────────────────────────────────────────────────────
+        #  PARALLEL BROWSERS
+        # ────────────────────────────────────────────────────────
+        x, y = self._p(183, 266)
+        ctk.CTkLabel(
+            c, text="BROWSERS",
+            text_color=TEXT, fg_color="transparent",
+            font=("Verdana", 14), anchor="w",
+            width=86, height=32, justify="left",
+        ).place(x=x, y=y)
+
+        self.browsers_var = ctk.StringVar(
+            value=str(self.config_mgr.get_browser_workers())
+        )
+        x, y = self._p(271, 268)
+        self.browsers_menu = ctk.CTkOptionMenu(
+            c, values=[str(n) for n in range(1, 9)],
+            variable=self.browsers_var,
+            fg_color=BG_INPUT, button_color=BG_INPUT,
+            button_hover_color="#4A4490",
+            dropdown_fg_color=BG_INPUT,
+            dropdown_hover_color="#4A4490",
+            text_color="#FFFFFF", dropdown_text_color="#FFFFFF",
+            font=("Arial", 14), dropdown_font=("Arial", 14),
+            width=56, height=28, corner_radius=7,
+        )
+        self.browsers_menu.place(x=x, y=y)
+
         # ────────────────────────────────────────────────────────
         #  TARGET USERNAME / URL
         # ────────────────────────────────────────────────────────
@@ -458,6 +488,7 @@ class InstajectionApp(ctk.CTk):
 
         # Save download order
         self.config_mgr.set_download_order(self.order_var.get())
+        self.config_mgr.set_browser_workers(int(self.browsers_var.get()))
 
         # UI state
         self.is_running = True
@@ -490,6 +521,9 @@ class InstajectionApp(ctk.CTk):
         # Force-kill the browser from the main thread — instant death
         def _force_kill():
             bot = self.active_bot
+            pool = bot.pool if bot else None
+            if pool:
+                pool.close()
             if bot and bot.driver:
                 try:
                     bot.driver.quit()
@@ -508,6 +542,7 @@ class InstajectionApp(ctk.CTk):
         bot = InstagramBot(
             log_callback=self._thread_safe_log,
             stop_flag=self.stop_event,
+            config=self.config_mgr,
         )
         self.active_bot = bot
         try:
@@ -545,6 +580,15 @@ class InstajectionApp(ctk.CTk):
             pass
         self.after(16, self._poll_log_queue)   # ~60 fps
 
+    def _poll_throughput(self):
+        """Show live download speed in the status label while running."""
+        bot = self.active_bot
+        dm = bot.download_manager if bot else None
+        if self.is_running and dm is not None:
+            rate = ThroughputMeter.format_rate(dm.current_throughput())
+            self.status_label.configure(text=f"↓ {rate}", text_color=TEXT_MUTED)
+        self.after(1000, self._poll_throughput)
+
     def _on_bot_done(self):
         """Called on the main thread when the bot finishes."""
         self.is_running = False
@@ -0,0 +1,137 @@
+"""
+INSTAJECTION — Video Rendition Selection.
+Picks the best video URL among a post's candidates. Candidates are
+normalised and deduplicated first, then ranked by the width / height /
+bitrate Instagram publishes with them. Only candidates without any
+metadata are sized with HEAD requests, run in parallel, and the sizes are
+cached per canonical URL for the rest of the process.
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cdn_url import bitrate_hint, canonical_url, unescape
+from http_session import HttpClient
+from post_data import VideoCandidate, video_candidates
+
+
+# Page-source fallback when no embedded JSON names the post (bounded, no
+# lazy match across the document)
+_SOURCE_PATTERNS = (
+    re.compile(r'"video_url"\s*:\s*"([^"]+\.mp4[^"]*)"'),
+    re.compile(r'"(?:src|url)"\s*:\s*"(https?:[^"]+\.mp4[^"]*)"'),
+)
+
+PROBE_WORKERS = 8
+CACHE_SIZE = 2048
+
+
+class _SizeCache:
+    """Content-Length per canonical URL, bounded LRU."""
+
+    def __init__(self, limit: int = CACHE_SIZE):
+        self.limit = limit
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            size = self._sizes.get(key)
+            if size is not None:
+                self._sizes.move_to_end(key)
+            return size
+
+    def put(self, key: str, size: int):
+        with self._lock:
+            self._sizes[key] = size
+            self._sizes.move_to_end(key)
+            while len(self._sizes) > self.limit:
+                self._sizes.popitem(last=False)
+
+
+_sizes = _SizeCache()
+
+
+# ── Candidates ─────────────────────────────────────────────────
+
+def candidates_from_json(texts: Iterable[str], post_id: str) -> List[VideoCandidate]:
+    """Renditions of ``post_id`` in embedded JSON bodies."""
+    out: List[VideoCandidate] = []
+    for text in texts:
+        try:
+            out.extend(video_candidates(json.loads(text), post_id))
+        except ValueError:
+            continue
+    return out
+
+
+def candidates_from_source(page: str) -> List[VideoCandidate]:
+    """Bare .mp4 URLs in the page source (no metadata)."""
+    return [
+        VideoCandidate(m)
+        for pat in _SOURCE_PATTERNS
+        for m in pat.findall(page)
+    ]
+
+
+def dedupe(candidates: Iterable[VideoCandidate]) -> List[VideoCandidate]:
+    """One candidate per canonical URL, keeping the richest metadata."""
+    best: Dict[str, VideoCandidate] = {}
+    for c in candidates:
+        url = unescape(c.url)
+        if not url.startswith("http"):
+            continue
+        c = c._replace(url=url, bitrate=c.bitrate or bitrate_hint(url))
+        key = canonical_url(url)
+        known = best.get(key)
+        if known is None or c.rank > known.rank:
+            best[key] = c
+    return list(best.values())
+
+
+# ── Ranking / probing ──────────────────────────────────────────
+
+def _head(url: str) -> int:
+    try:
+        r = HttpClient.shared().head(url, timeout=10, allow_redirects=True)
+        return int(r.headers.get("content-length", 0)) if r.ok else 0
+    except Exception:
+        return 0
+
+
+def probe_sizes(urls: List[str]) -> Dict[str, int]:
+    """Content-Length of each URL; cached ones skip the network, the rest
+    are probed in parallel."""
+    sizes: Dict[str, int] = {}
+    missing: List[str] = []
+    for url in urls:
+        cached = _sizes.get(canonical_url(url))
+        if cached is None:
+            missing.append(url)
+        else:
+            sizes[url] = cached
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(missing))) as pool:
+            for url, size in zip(missing, pool.map(_head, missing)):
+                sizes[url] = size
+                if size:
+                    _sizes.put(canonical_url(url), size)
+    return sizes
+
+
+def best_video(candidates: Iterable[VideoCandidate]) -> Tuple[Optional[str], int]:
+    """``(url, size)`` of the best rendition; size is 0 when it was chosen
+    from metadata without a probe, url is None when nothing could be sized."""
+    unique = dedupe(candidates)
+    if not unique:
+        return None, 0
+    ranked = [c for c in unique if c.rank > (0, 0)]
+    if ranked:
+        return max(ranked, key=lambda c: c.rank).url, 0
+    sizes = probe_sizes([c.url for c in unique])
+    url = max(sizes, key=sizes.get)
+    return (url, sizes[url]) if sizes[url] else (None, 0)